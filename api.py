@@ -0,0 +1,176 @@
+import json
+from datetime import datetime
+
+from flask import Blueprint, Response, request
+
+from models import db, Venue, Artist, Show
+from pagination import paginate, page_size_arg
+from revisions import conditional
+
+#----------------------------------------------------------------------------#
+# JSON API (/api/v1).
+#
+# Every resource is read with a column-projected query: only the fields a
+# client asks for with ?fields=id,name (or the resource's defaults) are
+# selected, plus the pagination keys, and joins are added only when a
+# requested field needs them. Rows are serialized straight from the result
+# tuples without building ORM objects.
+#----------------------------------------------------------------------------#
+
+api = Blueprint('api_v1', __name__, url_prefix='/api/v1')
+
+
+class FieldError(ValueError):
+    pass
+
+
+class Resource(object):
+
+    def __init__(self, model, fields, defaults, keys, joins=None):
+        self.model = model
+        self.fields = fields  # name -> column
+        self.defaults = defaults
+        self.keys = keys
+        self.joins = joins or {}  # field name -> (model, onclause) it needs
+
+    def parse_fields(self, value):
+        if not value:
+            return list(self.defaults)
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = [name for name in names if name not in self.fields]
+        if unknown or not names:
+            raise FieldError(f"Unknown field(s) {', '.join(unknown) or value!r}; "
+                             f"available: {', '.join(self.fields)}")
+        return list(dict.fromkeys(names))
+
+    def query(self, names):
+        # Pagination keys are selected too, under their own names, but only
+        # the requested fields are serialized
+        columns = [self.fields[name].label(name) for name in names]
+        columns += [key for key in self.keys if key.key not in names]
+        query = db.session.query(*columns).select_from(self.model)
+        joined = set()
+        for name in names:
+            if name in self.joins and self.joins[name][0] not in joined:
+                target, onclause = self.joins[name]
+                query = query.join(target, onclause)
+                joined.add(target)
+        return query
+
+
+RESOURCES = {
+    'venues': Resource(
+        Venue,
+        fields={
+            'id': Venue.id, 'name': Venue.name, 'city': Venue.city, 'state': Venue.state,
+            'address': Venue.address, 'phone': Venue.phone, 'genres': Venue.genres,
+            'image_link': Venue.image_link, 'facebook_link': Venue.facebook_link,
+            'website_link': Venue.website_link, 'seeking_talent': Venue.seeking_talent,
+            'seeking_description': Venue.seeking_description,
+            'upcoming_shows_count': Venue.upcoming_shows_count, 'updated_at': Venue.updated_at,
+        },
+        defaults=('id', 'name', 'city', 'state', 'upcoming_shows_count'),
+        keys=[Venue.id],
+    ),
+    'artists': Resource(
+        Artist,
+        fields={
+            'id': Artist.id, 'name': Artist.name, 'city': Artist.city, 'state': Artist.state,
+            'phone': Artist.phone, 'genres': Artist.genres, 'image_link': Artist.image_link,
+            'facebook_link': Artist.facebook_link, 'website_link': Artist.website_link,
+            'seeking_venue': Artist.seeking_venue, 'seeking_description': Artist.seeking_description,
+            'upcoming_shows_count': Artist.upcoming_shows_count, 'updated_at': Artist.updated_at,
+        },
+        defaults=('id', 'name', 'city', 'state', 'upcoming_shows_count'),
+        keys=[Artist.id],
+    ),
+    'shows': Resource(
+        Show,
+        fields={
+            'id': Show.id, 'start_time': Show.show_time, 'venue_id': Show.venue_id,
+            'venue_name': Venue.name, 'artist_id': Show.artist_id, 'artist_name': Artist.name,
+            'artist_image_link': Artist.image_link, 'updated_at': Show.updated_at,
+        },
+        defaults=('id', 'start_time', 'venue_id', 'venue_name', 'artist_id', 'artist_name'),
+        keys=[Show.show_time, Show.id],
+        joins={
+            'venue_name': (Venue, Venue.id == Show.venue_id),
+            'artist_name': (Artist, Artist.id == Show.artist_id),
+            'artist_image_link': (Artist, Artist.id == Show.artist_id),
+        },
+    ),
+}
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def json_response(payload, status=200):
+    # Compact separators and no key sorting; jsonify pretty-prints in debug mode
+    body = json.dumps(payload, separators=(',', ':'), default=_json_default)
+    return Response(body, status=status, mimetype='application/json')
+
+
+def serialize(names, rows):
+    return [dict(zip(names, row)) for row in rows]
+
+
+def list_resource(kind):
+    resource = RESOURCES[kind]
+    names = resource.parse_fields(request.args.get('fields'))
+    page = paginate(resource.query(names), resource.keys,
+                    cursor=request.args.get('cursor'), page_size=page_size_arg())
+    return json_response({kind: serialize(names, page.items), "paging": page.to_dict()})
+
+
+def get_resource(kind, resource_id):
+    resource = RESOURCES[kind]
+    names = resource.parse_fields(request.args.get('fields'))
+    row = resource.query(names).filter(resource.model.id == resource_id).first()
+    if row is None:
+        return json_response({"error": "Not found"}, 404)
+    return json_response(serialize(names, [row])[0])
+
+
+@api.errorhandler(FieldError)
+def field_error(error):
+    return json_response({"error": str(error)}, 400)
+
+
+@api.route('/venues')
+@conditional('venues', 'shows')
+def venues():
+    return list_resource('venues')
+
+
+@api.route('/venues/<int:venue_id>')
+@conditional('venues', 'shows')
+def venue(venue_id):
+    return get_resource('venues', venue_id)
+
+
+@api.route('/artists')
+@conditional('artists', 'shows')
+def artists():
+    return list_resource('artists')
+
+
+@api.route('/artists/<int:artist_id>')
+@conditional('artists', 'shows')
+def artist(artist_id):
+    return get_resource('artists', artist_id)
+
+
+@api.route('/shows')
+@conditional('shows', 'venues', 'artists')
+def shows():
+    return list_resource('shows')
+
+
+@api.route('/shows/<int:show_id>')
+@conditional('shows', 'venues', 'artists')
+def show(show_id):
+    return get_resource('shows', show_id)
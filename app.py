@@ -5,6 +5,8 @@
 import json
 import dateutil.parser
 import babel
+import babel.dates
+from functools import lru_cache
 from flask import (
    Flask, 
    jsonify, 
@@ -13,17 +15,37 @@ from flask import (
    Response, 
    flash, 
    redirect, 
-   url_for
+   url_for,
+   stream_with_context
   )
 from flask_moment import Moment
+from markupsafe import Markup
 from flask_sqlalchemy import SQLAlchemy
 import logging
 from logging import Formatter, FileHandler
 from flask_wtf import Form
 from forms import *
 from flask_migrate import Migrate
-from datetime import datetime
-from models import db, Venue, Artist, Show
+from datetime import datetime, timedelta
+from itertools import groupby
+from models import db, Venue, Artist, Show, area_key
+from api import api
+from assets import assets_cli, configure_assets
+from compression import compression_stats, configure_compression
+from counters import counters_cli, uncount_shows
+from jobs import jobs_cli, queue_stats
+from importer import import_cli
+from export import ExportError, FORMATS, export_cli, generate_export, parse_since
+from pagination import InvalidCursor, paginate, page_size_arg
+from search import search, get_backend
+from facets import browse_query, canonical_genre, facet_counts
+from scheduling import BatchError, schedule_shows
+from typeahead import configure_typeahead, lookup, INDEXES
+from cache import page_cache, fragment_cache, venue_page_key, artist_page_key, show_tile_key
+from db_pool import configure_pool, pool_metrics
+from profiler import endpoint_stats, init_profiler
+from routing import configure_replicas, read_replica_key, replicas
+from revisions import NAME_REVISIONS, bump_revisions, conditional, request_revisions
 #----------------------------------------------------------------------------#
 # App Config.
 #----------------------------------------------------------------------------#
@@ -31,24 +53,119 @@ from models import db, Venue, Artist, Show
 app = Flask(__name__)
 moment = Moment(app)
 app.config.from_object('config')
+configure_pool(app)
+configure_replicas(app)
 db.init_app(app)
 
 migrate = Migrate(app, db)
+app.cli.add_command(counters_cli)
+app.cli.add_command(import_cli)
+app.cli.add_command(export_cli)
+app.cli.add_command(jobs_cli)
+app.cli.add_command(assets_cli)
+# Hold back replica-rendered pages for as long as writers are kept on the primary
+page_cache.configure(app.config['PAGE_CACHE_SIZE'], app.config['PAGE_CACHE_TTL'],
+                     app.config['REPLICA_STICKY_SECONDS'] if replicas.keys else 0)
+fragment_cache.configure(app.config['FRAGMENT_CACHE_SIZE'], app.config['FRAGMENT_CACHE_TTL'])
+init_profiler(app)
+configure_typeahead(app.config['TYPEAHEAD_REFRESH_INTERVAL'])
+app.register_blueprint(api)
+configure_assets(app)
+configure_compression(app)
 
 #----------------------------------------------------------------------------#
 # Filters.
 #----------------------------------------------------------------------------#
 
+DATETIME_LOCALE = babel.Locale.parse('en')
+
+# Named formats used by the templates, parsed once
+DATETIME_PATTERNS = {
+  'full': babel.dates.parse_pattern("EEEE MMMM, d, y 'at' h:mma"),
+  'medium': babel.dates.parse_pattern("EE MM, dd, y h:mma"),
+}
+
+# The format the controllers serialize show times in
+ISO_FORMAT_LENGTH = len('2019-05-21T21:30:00.000000Z')
+
+def parse_datetime(value):
+  if isinstance(value, datetime):
+    return value
+  # Fast path for our own ISO strings; anything else goes through dateutil
+  if len(value) == ISO_FORMAT_LENGTH and value.endswith('Z'):
+    try:
+      return datetime.fromisoformat(value[:-1])
+    except ValueError:
+      pass
+  return dateutil.parser.parse(value)
+
+@lru_cache(maxsize=16384)
+def _format_datetime(date, format):
+  pattern = DATETIME_PATTERNS.get(format)
+  if pattern is None:
+    return babel.dates.format_datetime(date, format, locale=DATETIME_LOCALE)
+  return pattern.apply(date, DATETIME_LOCALE)
+
 def format_datetime(value, format='medium'):
-  date = dateutil.parser.parse(value)
-  if format == 'full':
-      format="EEEE MMMM, d, y 'at' h:mma"
-  elif format == 'medium':
-      format="EE MM, dd, y h:mma"
-  return babel.dates.format_datetime(date, format, locale='en')
+  return _format_datetime(parse_datetime(value), format)
 
 app.jinja_env.filters['datetime'] = format_datetime
 
+#----------------------------------------------------------------------------#
+# Helpers.
+#----------------------------------------------------------------------------#
+
+def wants_json():
+  # Listing pages answer with JSON for ?format=json or an Accept: application/json request
+  if request.args.get('format') == 'json':
+    return True
+  return request.accept_mimetypes.best == 'application/json'
+
+def browse(model, columns, key):
+  # One page of `model` filtered by ?genre=, ?city= and ?state=, with facet counts
+  genre = canonical_genre(request.args.get('genre'))
+  if request.args.get('genre') and not genre:
+    return jsonify({"error": f"Unknown genre {request.args['genre']!r}"}), 400
+  city = request.args.get('city') or None
+  state = request.args.get('state') or None
+
+  page = paginate(browse_query(model, columns, genre, city, state), [model.id],
+                  cursor=request.args.get('cursor'), page_size=page_size_arg())
+  return jsonify({
+      "filters": {"genre": genre, "city": city, "state": state},
+      "facets": facet_counts(model, genre, city, state),
+      key: [row._asdict() for row in page.items],
+      "paging": page.to_dict(),
+  })
+
+def typeahead(kind):
+  # id + name lookups for the artist/venue pickers on the show form
+  limit = max(1, min(request.args.get('limit', app.config['TYPEAHEAD_LIMIT'], type=int),
+                     app.config['TYPEAHEAD_MAX_LIMIT']))
+  return jsonify(lookup(kind, request.args.get('q', ''), request.args.get('cursor'), limit))
+
+def invalidate_venue_pages(venue_id):
+  # A venue page is also embedded (name, image) in the pages of the artists playing there
+  artist_ids = db.session.query(Show.artist_id).filter(Show.venue_id == venue_id).distinct()
+  page_cache.invalidate(venue_page_key(venue_id), *[artist_page_key(row.artist_id) for row in artist_ids])
+
+def invalidate_artist_pages(artist_id):
+  venue_ids = db.session.query(Show.venue_id).filter(Show.artist_id == artist_id).distinct()
+  page_cache.invalidate(artist_page_key(artist_id), *[venue_page_key(row.venue_id) for row in venue_ids])
+
+def delete_with_shows(model, model_id, show_fk):
+  # Set-based delete of a venue or artist and all of its shows: one UPDATE
+  # per counter table and one DELETE per table, however many shows there are.
+  # Show rows are deleted explicitly (the FKs also cascade) so that SQLite,
+  # which does not enforce foreign keys by default, stays consistent.
+  playing = show_fk == model_id
+  uncount_shows(playing)
+  db.session.execute(Show.__table__.delete().where(playing))
+  table = model.__table__
+  deleted = db.session.execute(table.delete().where(table.c.id == model_id)).rowcount
+  bump_revisions(db.session.connection(), 'venues', 'artists', 'shows', NAME_REVISIONS[model])
+  return deleted
+
 #----------------------------------------------------------------------------#
 # Controllers.
 #----------------------------------------------------------------------------#
@@ -62,78 +179,113 @@ def index():
 #  ----------------------------------------------------------------
 
 @app.route('/venues')
+@conditional('venues', 'shows')
 def venues():
+  # One page of venues in a single round trip, ordered so that areas are contiguous
+  # The same expressions as ix_Venue_area, so every page is an index range scan
+  city = area_key(Venue.city).label('city')
+  state = area_key(Venue.state).label('state')
+  venues_query = db.session.query(
+      Venue.id,
+      Venue.name,
+      city,
+      state,
+      Venue.upcoming_shows_count
+  )
+  page = paginate(venues_query, [state, city, Venue.id],
+                  cursor=request.args.get('cursor'), page_size=page_size_arg())
+
+  # Group the rows into areas in Python
+  data = []
+  for (city, state), venues_in_area in groupby(page.items, key=lambda venue: (venue.city, venue.state)):
+      data.append({
+          "city": city,
+          "state": state,
+          "venues": [{
+              "id": venue.id,
+              "name": venue.name,
+              "num_upcoming_shows": venue.upcoming_shows_count
+          } for venue in venues_in_area]
+      })
 
-  areas = Venue.query.with_entities(Venue.city, Venue.state).distinct().all()
-  data=[]
-  for area in areas:
-        venues_in_area = Venue.query.filter_by(city=area.city, state=area.state).all()
-        
-        # Format each venue entry with the required fields
-        venue_data = [{
-            "id": venue.id,
-            "name": venue.name,
-            "num_upcoming_shows": venue.num_upcoming_shows()  # Assuming you have this method implemented in your model
-        } for venue in venues_in_area]
-        
-        # Append area data with venues
-        data.append({
-            "city": area.city,
-            "state": area.state,
-            "venues": venue_data
-        })
-  return render_template('pages/venues.html', areas=data);
+  if wants_json():
+    return jsonify({"areas": data, "paging": page.to_dict()})
+  return render_template('pages/venues.html', areas=data, page=page)
 
 @app.route('/venues/search', methods=['POST'])
 def search_venues():
   # Get the search term from the form
     search_term = request.form.get('search_term', '')
 
-    # Query the database for venues with names that match the search term
-    matched_venues = Venue.query.filter(Venue.name.ilike(f'%{search_term}%')).all()
+    # Query the search index for venues matching the search term, best matches first
+    matched_venues = search(Venue, search_term, Venue.id, Venue.name, Venue.upcoming_shows_count)
 
     # Format the response
     response = {
         "count": len(matched_venues),
-        "data": []
-    }
-    
-    # Populate response data with each venue's details
-    for venue in matched_venues:
-        response["data"].append({
+        "data": [{
             "id": venue.id,
             "name": venue.name,
-            "num_upcoming_shows": venue.num_upcoming_shows()  # Assuming this method is in your Venue model
-        })
+            "num_upcoming_shows": venue.upcoming_shows_count
+        } for venue in matched_venues]
+    }
 
     # Render the results with the search term
     return render_template('pages/search_venues.html', 
                            results=response, search_term=search_term)
 
+@app.route('/venues/typeahead')
+def typeahead_venues():
+  return typeahead('venues')
+
+@app.route('/venues/browse')
+@conditional('venues', 'shows')
+def browse_venues():
+  return browse(Venue, [Venue.id, Venue.name, Venue.city, Venue.state, Venue.genres,
+                        Venue.upcoming_shows_count], 'venues')
+
 @app.route('/venues/<int:venue_id>')
+@conditional('venues', 'shows', 'artists')
 def show_venue(venue_id):
+    # Serve the rendered page from the cache when it was rendered at the
+    # revisions this response's ETag names; other processes write too
+    revisions = request_revisions()
+    cached = page_cache.get(venue_page_key(venue_id)) if revisions else None
+    if cached is not None and cached[0] == revisions:
+        return cached[1]
+
   # Query the database for the venue with the specified venue_id
     venue = Venue.query.get(venue_id)
     if not venue:
         return render_template('errors/404.html'), 404
 
-    # Prepare past and upcoming shows
-    past_shows = []
-    upcoming_shows = []
-    
-    # Query related shows and classify them based on their start time
-    for show in venue.shows:
-        show_data = {
-            "artist_id": show.artist.id,
-            "artist_name": show.artist.name,
-            "artist_image_link": show.artist.image_link,
-            "start_time": show.show_time.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
-        }
-        if show.show_time < datetime.now():
-            past_shows.append(show_data)
-        else:
-            upcoming_shows.append(show_data)
-    
+    # Fetch the venue's shows with the artist fields they display in one
+    # projected join per section, split into past and upcoming in SQL
+    now = datetime.now()
+    shows_query = db.session.query(
+        Show.artist_id,
+        Artist.name.label("artist_name"),
+        Artist.image_link.label("artist_image_link"),
+        Show.show_time
+    ).join(Artist).filter(Show.venue_id == venue_id)
+    past_shows_query = shows_query.filter(Show.show_time < now).order_by(Show.show_time.desc()).all()
+    upcoming_shows_query = shows_query.filter(Show.show_time >= now).order_by(Show.show_time).all()
+
+    # Format past and upcoming shows
+    past_shows = [{
+        "artist_id": show.artist_id,
+        "artist_name": show.artist_name,
+        "artist_image_link": show.artist_image_link,
+        "start_time": show.show_time
+    } for show in past_shows_query]
+
+    upcoming_shows = [{
+        "artist_id": show.artist_id,
+        "artist_name": show.artist_name,
+        "artist_image_link": show.artist_image_link,
+        "start_time": show.show_time
+    } for show in upcoming_shows_query]
+
     # Prepare the data dictionary to pass to the template
     data = {
         "id": venue.id,
@@ -155,7 +307,10 @@ def show_venue(venue_id):
     }
     
     # Render the template with the venue data
-    return render_template('pages/show_venue.html', venue=data)
+    page = render_template('pages/show_venue.html', venue=data)
+    if revisions:
+        page_cache.set(venue_page_key(venue_id), (revisions, page), maybe_stale=read_replica_key() is not None)
+    return page
 
 #  Create Venue
 #  ----------------------------------------------------------------
@@ -209,14 +364,15 @@ def create_venue_submission():
     # If form validation fails, return a JSON error response
   return jsonify({'success': False, 'message': 'Form validation failed'}), 400
 
-@app.route('/venues/<venue_id>', methods=['DELETE'])
+@app.route('/venues/<int:venue_id>', methods=['DELETE'])
 def delete_venue(venue_id):
   try:
-      venue = Venue.query.get(venue_id)
-      if not venue:
-          return jsonify({"error": "Venue not found"}), 404
+      # Collect the affected pages before the venue's shows are gone
+      invalidate_venue_pages(venue_id)
 
-      db.session.delete(venue)
+      if not delete_with_shows(Venue, venue_id, Show.venue_id):
+          db.session.rollback()
+          return jsonify({"error": "Venue not found"}), 404
       db.session.commit()
       return jsonify({"success": True}), 200  # Respond with success status
 
@@ -231,40 +387,60 @@ def delete_venue(venue_id):
 #  Artists
 #  ----------------------------------------------------------------
 @app.route('/artists')
+@conditional('artists')
 def artists():
-  # Fetch all artists from the database
-  artists_query = Artist.query.all()
+  # Fetch one page of artists from the database
+  artists_query = db.session.query(Artist.id, Artist.name)
+  page = paginate(artists_query, [Artist.id],
+                  cursor=request.args.get('cursor'), page_size=page_size_arg())
 
   # Prepare data for rendering
   data = [{
       "id": artist.id,
       "name": artist.name,
-  } for artist in artists_query]
+  } for artist in page.items]
 
-  return render_template('pages/artists.html', artists=data)
+  if wants_json():
+    return jsonify({"artists": data, "paging": page.to_dict()})
+  return render_template('pages/artists.html', artists=data, page=page)
 
 @app.route('/artists/search', methods=['POST'])
 def search_artists():
   # Get the search term from the form
   search_term = request.form.get('search_term', '')
-  # Query the database for venues with names that match the search term
-  matched_artists = Artist.query.filter(Artist.name.ilike(f'%{search_term}%')).all()
+  # Query the search index for artists matching the search term, best matches first
+  matched_artists = search(Artist, search_term, Artist.id, Artist.name)
   # Format the response
   response = {
       "count": len(matched_artists),
-      "data": []
-  }
-  # Populate response data with each venue's details
-  for artist in matched_artists:
-      response["data"].append({
+      "data": [{
           "id": artist.id,
           "name": artist.name
-      })
+      } for artist in matched_artists]
+  }
   return render_template('pages/search_artists.html', 
                          results=response, search_term=request.form.get('search_term', ''))
 
+@app.route('/artists/typeahead')
+def typeahead_artists():
+  return typeahead('artists')
+
+@app.route('/artists/browse')
+@conditional('artists', 'shows')
+def browse_artists():
+  return browse(Artist, [Artist.id, Artist.name, Artist.city, Artist.state, Artist.genres,
+                         Artist.upcoming_shows_count], 'artists')
+
 @app.route('/artists/<int:artist_id>')
+@conditional('artists', 'shows', 'venues')
 def show_artist(artist_id):
+    # Serve the rendered page from the cache when it was rendered at the
+    # revisions this response's ETag names; other processes write too
+    revisions = request_revisions()
+    cached = page_cache.get(artist_page_key(artist_id)) if revisions else None
+    if cached is not None and cached[0] == revisions:
+        return cached[1]
+
   # Fetch the artist with the given artist_id
     artist = Artist.query.get(artist_id)
 
@@ -292,7 +468,7 @@ def show_artist(artist_id):
         "venue_id": show.venue_id,
         "venue_name": show.venue_name,
         "venue_image_link": show.venue_image_link,
-        "start_time": show.show_time.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+        "start_time": show.show_time
     } for show in past_shows_query]
 
     # Format upcoming shows
@@ -300,7 +476,7 @@ def show_artist(artist_id):
         "venue_id": show.venue_id,
         "venue_name": show.venue_name,
         "venue_image_link": show.venue_image_link,
-        "start_time": show.show_time.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+        "start_time": show.show_time
     } for show in upcoming_shows_query]
 
     # Prepare data for rendering
@@ -322,7 +498,30 @@ def show_artist(artist_id):
         "upcoming_shows_count": len(upcoming_shows),
     }
 
-    return render_template('pages/show_artist.html', artist=data)
+    page = render_template('pages/show_artist.html', artist=data)
+    if revisions:
+        page_cache.set(artist_page_key(artist_id), (revisions, page), maybe_stale=read_replica_key() is not None)
+    return page
+
+@app.route('/artists/<int:artist_id>', methods=['DELETE'])
+def delete_artist(artist_id):
+  try:
+      # Collect the affected pages before the artist's shows are gone
+      invalidate_artist_pages(artist_id)
+
+      if not delete_with_shows(Artist, artist_id, Show.artist_id):
+          db.session.rollback()
+          return jsonify({"error": "Artist not found"}), 404
+      db.session.commit()
+      return jsonify({"success": True}), 200
+
+  except Exception as e:
+      db.session.rollback()
+      print(f"Error deleting artist {artist_id}: {e}")
+      return jsonify({"error": "An error occurred while deleting the artist."}), 500
+
+  finally:
+      db.session.close()
 
 #  Update
 #  ----------------------------------------------------------------
@@ -362,6 +561,7 @@ def edit_artist_submission(artist_id):
 
       # Commit the changes to the database
       db.session.commit()
+      invalidate_artist_pages(artist_id)
 
       # Redirect to the artist's page after update
       return jsonify({"success": True}), 200
@@ -400,6 +600,7 @@ def edit_venue_submission(venue_id):
 
     # Commit the changes to the database
     db.session.commit()
+    invalidate_venue_pages(venue_id)
 
     # Redirect to the artist's page after update
     return jsonify({"success": True}), 200
@@ -472,30 +673,114 @@ def create_artist_submission():
 #  ----------------------------------------------------------------
 
 @app.route('/shows')
+@conditional('shows', 'venues', 'artists')
 def shows():
-  # Query to fetch all shows, along with associated venue and artist data
-    shows_data = db.session.query(
+  # Query one page of shows, along with associated venue and artist data
+    shows_query = db.session.query(
+      Show.id,
       Show.venue_id,
       Venue.name.label("venue_name"),
       Show.artist_id,
       Artist.name.label("artist_name"),
       Artist.image_link.label("artist_image_link"),
       Show.show_time
-    ).join(Venue, Show.venue_id == Venue.id).join(Artist, Show.artist_id == Artist.id).all()
+    ).join(Venue, Show.venue_id == Venue.id).join(Artist, Show.artist_id == Artist.id)
+    page = paginate(shows_query, [Show.show_time, Show.id],
+                    cursor=request.args.get('cursor'), page_size=page_size_arg())
 
-    # Format the data for rendering
-    data = []
-    for show in shows_data:
-        data.append({
+    if wants_json():
+      data = [{
           "venue_id": show.venue_id,
           "venue_name": show.venue_name,
           "artist_id": show.artist_id,
           "artist_name": show.artist_name,
           "artist_image_link": show.artist_image_link,
           "start_time": show.show_time.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
-        })
+      } for show in page.items]
+      return jsonify({"shows": data, "paging": page.to_dict()})
+
+    # Render only the tiles whose displayed values changed since they were cached
+    tile_template = app.jinja_env.get_template('pages/show_tile.html')
+    tiles = []
+    for show in page.items:
+        key = show_tile_key(show)
+        tile = fragment_cache.get(key)
+        if tile is None:
+            tile = tile_template.render(show={
+                "venue_id": show.venue_id,
+                "venue_name": show.venue_name,
+                "artist_id": show.artist_id,
+                "artist_name": show.artist_name,
+                "artist_image_link": show.artist_image_link,
+                "start_time": show.show_time,
+            })
+            fragment_cache.set(key, tile)
+        tiles.append(Markup(tile))
+    return render_template('pages/shows.html', tiles=tiles, page=page)
+
+@app.route('/shows/calendar')
+def shows_calendar():
+  # Shows in [start, end) ordered by start time, optionally for one city/state/genre
+  try:
+    start = datetime.strptime(request.args['start'], '%Y-%m-%d') if 'start' in request.args \
+        else datetime.combine(datetime.today(), datetime.min.time())
+    end = datetime.strptime(request.args['end'], '%Y-%m-%d') if 'end' in request.args \
+        else start + timedelta(days=app.config['CALENDAR_DEFAULT_DAYS'])
+  except ValueError:
+    return jsonify({"error": "start and end must be dates formatted as YYYY-MM-DD"}), 400
+  if end <= start or end - start > timedelta(days=app.config['CALENDAR_MAX_DAYS']):
+    return jsonify({"error": f"The date range must span 1 to {app.config['CALENDAR_MAX_DAYS']} days"}), 400
+  # Genres are matched like /venues/browse and /artists/browse: case-insensitively, known ones only
+  genre = canonical_genre(request.args.get('genre'))
+  if request.args.get('genre') and not genre:
+    return jsonify({"error": f"Unknown genre {request.args['genre']!r}"}), 400
+
+  # Range scan on show_time; the venue/artist filters are applied to the joined rows
+  shows_query = db.session.query(
+      Show.id,
+      Show.show_time,
+      Show.venue_id,
+      Venue.name.label("venue_name"),
+      Venue.city,
+      Venue.state,
+      Show.artist_id,
+      Artist.name.label("artist_name"),
+      Artist.image_link.label("artist_image_link")
+  ).join(Venue, Show.venue_id == Venue.id).join(Artist, Show.artist_id == Artist.id
+  ).filter(Show.show_time >= start, Show.show_time < end)
+
+  if request.args.get('city'):
+    shows_query = shows_query.filter(Venue.city == request.args['city'])
+  if request.args.get('state'):
+    shows_query = shows_query.filter(Venue.state == request.args['state'])
+  if genre:
+    backend = get_backend()
+    shows_query = shows_query.filter(db.or_(*backend.genre_filter(Venue, [genre]), *backend.genre_filter(Artist, [genre])))
+
+  # Stream rows from a server-side cursor instead of materializing the month
+  shows_query = shows_query.order_by(Show.show_time, Show.id
+  ).execution_options(stream_results=True).yield_per(app.config['STREAM_BATCH_SIZE'])
+
+  def generate():
+    yield '{"start": %s, "end": %s, "shows": [' % (json.dumps(start.isoformat()), json.dumps(end.isoformat()))
+    separator = ''
+    for show in shows_query:
+      yield separator + json.dumps({
+          "id": show.id,
+          "date": show.show_time.date().isoformat(),
+          "start_time": show.show_time.strftime('%Y-%m-%dT%H:%M:%S.%fZ'),
+          "venue_id": show.venue_id,
+          "venue_name": show.venue_name,
+          "city": show.city,
+          "state": show.state,
+          "artist_id": show.artist_id,
+          "artist_name": show.artist_name,
+          "artist_image_link": show.artist_image_link,
+      })
+      separator = ','
+    yield ']}'
 
-    return render_template('pages/shows.html', shows=data)
+  return Response(stream_with_context(generate()), mimetype='application/json')
 
 @app.route('/shows/create')
 def create_shows():
@@ -523,6 +808,7 @@ def create_show_submission():
     
       db.session.add(new_show)
       db.session.commit()
+      page_cache.invalidate(venue_page_key(form.venue_id.data), artist_page_key(form.artist_id.data))
       # Show success message
       return jsonify({'success': True, 'message': f'Show was successfully listed!'})
 
@@ -539,10 +825,77 @@ def create_show_submission():
   return jsonify({'success': False, 'message': 'Form validation failed'}), 400
 
 
+@app.route('/shows/batch', methods=['POST'])
+def create_show_batch():
+  # Schedule many shows at once: {"shows": [{"artist_id", "venue_id", "start_time"}, ...]}
+  payload = request.get_json(silent=True) or {}
+  try:
+    created, results = schedule_shows(payload.get('shows'), app.config['SHOW_SLOT_MINUTES'],
+                                      app.config['SHOW_BATCH_MAX_ROWS'])
+    # Collected before the commit expires the new shows
+    pages = {venue_page_key(show.venue_id) for show in created} | {artist_page_key(show.artist_id) for show in created}
+    db.session.commit()
+  except BatchError as e:
+    db.session.rollback()
+    return jsonify({"error": str(e)}), 400
+  except Exception as e:
+    db.session.rollback()
+    print(f"Error scheduling shows: {e}")
+    return jsonify({"error": "An error occurred. The shows could not be listed."}), 500
+
+  page_cache.invalidate(*pages)
+  return jsonify({
+      "created": len(created),
+      "rejected": len(results) - len(created),
+      "results": results,
+  })
+
+
+#  Export
+#  ----------------------------------------------------------------
+
+@app.route('/export/<kind>')
+def export(kind):
+  # Stream a catalog table as NDJSON (default) or CSV, optionally only the
+  # rows after ?since_id= or updated since ?since=
+  format = request.args.get('format', 'ndjson')
+  try:
+    since = parse_since(request.args['since']) if 'since' in request.args else None
+    chunks = generate_export(kind, format, request.args.get('since_id', type=int), since,
+                             app.config['STREAM_BATCH_SIZE'])
+  except ExportError as e:
+    return jsonify({"error": str(e)}), 400
+
+  extension = 'csv' if format == 'csv' else 'ndjson'
+  return Response(stream_with_context(chunks), mimetype=FORMATS[format], headers={
+      "Content-Disposition": f'attachment; filename="{kind}.{extension}"'
+  })
+
+#  Metrics
+#  ----------------------------------------------------------------
+
+@app.route('/metrics')
+def metrics():
+  return jsonify({
+      "page_cache": page_cache.stats(),
+      "fragment_cache": fragment_cache.stats(),
+      "compression": compression_stats.to_dict(),
+      "db_pool": pool_metrics(db.engine),
+      "db_replicas": replicas.stats(),
+      "sql_profile": endpoint_stats.to_dict(),
+      "jobs": queue_stats(),
+      "typeahead": {kind: index.stats() for kind, index in INDEXES.items()},
+  })
+
+
 @app.errorhandler(404)
 def not_found_error(error):
     return render_template('errors/404.html'), 404
 
+@app.errorhandler(InvalidCursor)
+def invalid_cursor_error(error):
+    return jsonify({"error": "Invalid pagination cursor"}), 400
+
 @app.errorhandler(500)
 def server_error(error):
     return render_template('errors/500.html'), 500
@@ -562,13 +915,8 @@ if not app.debug:
 # Launch.
 #----------------------------------------------------------------------------#
 
-# Default port:
-# if __name__ == '__main__':
-#     app.run()
-
-# Or specify port manually:
-
+# Development server only; production runs wsgi:application under gunicorn
+# (see wsgi.py and gunicorn.conf.py). Debug mode follows FLASK_ENV/FLASK_DEBUG.
 if __name__ == '__main__':
-    app.debug = True
     app.run(host='0.0.0.0', port=5001)
 
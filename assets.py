@@ -0,0 +1,169 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+
+import click
+from flask import current_app, request, send_from_directory, url_for
+from flask.cli import AppGroup
+
+from compression import brotli
+
+#----------------------------------------------------------------------------#
+# Static asset fingerprinting.
+#
+# `flask assets build` copies static/ into ASSETS_FOLDER under content-hashed
+# names (css/main.css -> css/main.3f2a1b9c0d.css), writes .gz (and, with the
+# `brotli` package, .br) copies of every compressible file, and records the
+# mapping in manifest.json. Relative url(...) references in stylesheets are
+# rewritten to the hashed names first, so a changed font also changes the
+# hash of the stylesheet that loads it. Hashed files never change, so
+# /assets/ serves them, precompressed when the client accepts it, with a
+# one-year `immutable` Cache-Control. Without a manifest (local development)
+# asset_url() falls back to the plain /static/ URLs.
+#----------------------------------------------------------------------------#
+
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.map', '.svg', '.eot', '.ttf', '.otf', '.json', '.txt', '.html'}
+CSS_URL = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+MANIFEST_NAME = 'manifest.json'
+
+manifest = {}  # static path -> fingerprinted path
+hashed_names = set()
+
+
+def fingerprint(path, content):
+    digest = hashlib.md5(content).hexdigest()[:10]
+    base, extension = posixpath.splitext(path)
+    return f'{base}.{digest}{extension}'
+
+
+def rewrite_css_urls(path, content, hashed):
+    # url(../fonts/x.woff?v=1#y) -> url(../fonts/x.<hash>.woff?v=1#y) for files we have built
+    directory = posixpath.dirname(path)
+
+    def replace(match):
+        quote, reference = match.groups()
+        target, suffix = re.match(r'([^?#]*)(.*)', reference).groups()
+        if re.match(r'^([a-z]+:|/|#)', target):
+            return match.group(0)
+        resolved = posixpath.normpath(posixpath.join(directory, target))
+        if resolved not in hashed:
+            return match.group(0)
+        relative = posixpath.relpath(hashed[resolved], directory or '.')
+        return f'url({quote}{relative}{suffix}{quote})'
+
+    return CSS_URL.sub(replace, content.decode('utf-8')).encode('utf-8')
+
+
+def write_file(output, path, content):
+    destination = os.path.join(output, *path.split('/'))
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    with open(destination, 'wb') as f:
+        f.write(content)
+    if posixpath.splitext(path)[1] in COMPRESSIBLE_EXTENSIONS:
+        with open(destination + '.gz', 'wb') as f:
+            f.write(gzip.compress(content, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(destination + '.br', 'wb') as f:
+                f.write(brotli.compress(content, quality=11))
+
+
+def build_assets(source, output):
+    """Fingerprint every file under `source` into `output`; return the manifest."""
+    paths = []
+    for root, _, files in os.walk(source):
+        for name in files:
+            paths.append(posixpath.join(*os.path.relpath(os.path.join(root, name), source).split(os.sep)))
+    # Stylesheets last, so the files they reference already have hashed names
+    paths.sort(key=lambda path: (path.endswith('.css'), path))
+
+    if os.path.isdir(output):
+        shutil.rmtree(output)
+    hashed = {}
+    for path in paths:
+        with open(os.path.join(source, *path.split('/')), 'rb') as f:
+            content = f.read()
+        if path.endswith('.css'):
+            content = rewrite_css_urls(path, content, hashed)
+        hashed[path] = fingerprint(path, content)
+        write_file(output, hashed[path], content)
+        # The original name too, for references nothing rewrites (e.g. sourceMappingURL)
+        write_file(output, path, content)
+
+    with open(os.path.join(output, MANIFEST_NAME), 'w') as f:
+        json.dump(hashed, f, indent=2, sort_keys=True)
+    return hashed
+
+
+def load_manifest(folder):
+    try:
+        with open(os.path.join(folder, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def use_manifest(hashed):
+    manifest.clear()
+    manifest.update(hashed)
+    hashed_names.clear()
+    hashed_names.update(hashed.values())
+
+
+def asset_url(endpoint, **values):
+    """url_for() that sends url_for('static', filename=...) to the fingerprinted copy."""
+    if endpoint == 'static' and values.get('filename') in manifest:
+        values['filename'] = manifest[values['filename']]
+        endpoint = 'assets'
+    return url_for(endpoint, **values)
+
+
+def send_asset(filename):
+    folder = current_app.config['ASSETS_FOLDER']
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    encoding = None
+    if posixpath.splitext(filename)[1] in COMPRESSIBLE_EXTENSIONS:
+        encoding = request.accept_encodings.best_match([
+            suffix for suffix, extension in (('br', '.br'), ('gzip', '.gz'))
+            if os.path.isfile(os.path.join(folder, *filename.split('/')) + extension)
+        ])
+    if encoding:
+        response = send_from_directory(folder, filename + ('.br' if encoding == 'br' else '.gz'),
+                                       mimetype=mimetype, conditional=True)
+        response.headers['Content-Encoding'] = encoding
+    else:
+        response = send_from_directory(folder, filename, mimetype=mimetype, conditional=True)
+    response.vary.add('Accept-Encoding')
+    # Unhashed copies keep the default static max-age; they can change on the next build
+    if filename in hashed_names:
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    return response
+
+
+def configure_assets(app):
+    use_manifest(load_manifest(app.config['ASSETS_FOLDER']))
+    app.add_url_rule(app.config['ASSETS_URL_PATH'] + '/<path:filename>', 'assets', send_asset)
+    # Templates keep calling url_for('static', filename=...)
+    app.jinja_env.globals['url_for'] = asset_url
+
+#----------------------------------------------------------------------------#
+# Commands.
+#----------------------------------------------------------------------------#
+
+assets_cli = AppGroup('assets', help='Build fingerprinted, precompressed static assets.')
+
+
+@assets_cli.command('build', help='Fingerprint static/ into ASSETS_FOLDER and write its manifest.')
+def build_command():
+    output = current_app.config['ASSETS_FOLDER']
+    hashed = build_assets(current_app.static_folder, output)
+    use_manifest(hashed)
+    encodings = 'gzip and brotli' if brotli is not None else 'gzip'
+    click.echo(f'{len(hashed)} files fingerprinted into {output} ({encodings} copies of compressible files)')
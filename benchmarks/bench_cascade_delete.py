@@ -0,0 +1,101 @@
+"""Time to delete venues and artists holding tens of thousands of shows.
+
+Seeds a few venues and artists with many shows each, then deletes half of
+them the way an ORM cascade would (load every show into the session and
+delete them one by one) and the other half through DELETE /venues/<id> and
+DELETE /artists/<id>, which delete set-based. Reports the time per delete
+and checks that the upcoming show counters still match a full rebuild.
+
+    python benchmarks/bench_cascade_delete.py --database sqlite:////tmp/fyyur_bench.db
+    python benchmarks/bench_cascade_delete.py --database postgresql://localhost/fyyur_bench --shows 400000
+
+The database is dropped and recreated; never point this at real data.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+
+def delete_with_orm(db, Show, model, model_id, show_fk):
+    # Baseline: what `cascade='all, delete'` on the relationship would do
+    for show in Show.query.filter(show_fk == model_id).all():
+        db.session.delete(show)
+    db.session.delete(model.query.get(model_id))
+    db.session.commit()
+
+
+def counters(db, model):
+    return dict(db.session.query(model.id, model.upcoming_shows_count).all())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', default='sqlite:////tmp/fyyur_bench.db')
+    parser.add_argument('--venues', type=int, default=10)
+    parser.add_argument('--artists', type=int, default=10)
+    parser.add_argument('--shows', type=int, default=200000)
+    args = parser.parse_args()
+
+    # Configure the app before it is imported
+    os.environ['DATABASE_URL'] = args.database
+    os.environ['PAGE_CACHE_SIZE'] = '0'
+    os.environ['SQL_PROFILE_SAMPLE_RATE'] = '0'
+    os.environ['JOBS_EAGER'] = 'true'
+
+    import app as fyyur
+    import datagen
+    from counters import rebuild_upcoming_show_counts
+    from models import db, Venue, Artist, Show
+
+    with fyyur.app.app_context():
+        client = fyyur.app.test_client()
+        results = {}
+        drifted = []
+
+        for model, show_fk, prefix in ((Venue, Show.venue_id, '/venues'),
+                                       (Artist, Show.artist_id, '/artists')):
+            # Fresh data per model, as deleting venues also deletes the artists' shows
+            db.session.remove()
+            db.drop_all()
+            db.create_all()
+            print(f'Seeding {args.venues} venues, {args.artists} artists, {args.shows} shows...')
+            venue_ids, artist_ids = datagen.generate(venues=args.venues, artists=args.artists, shows=args.shows)
+            ids = venue_ids if model is Venue else artist_ids
+
+            half = len(ids) // 2
+            for label, batch in (('orm', ids[:half]), ('set-based', ids[half:])):
+                timings, shows = [], []
+                for model_id in batch:
+                    shows.append(Show.query.filter(show_fk == model_id).count())
+                    db.session.remove()
+                    started = time.perf_counter()
+                    if label == 'orm':
+                        delete_with_orm(db, Show, model, model_id, show_fk)
+                    else:
+                        response = client.delete(f'{prefix}/{model_id}')
+                        assert response.status_code == 200, (model_id, response.status_code)
+                    timings.append(time.perf_counter() - started)
+                results[(model.__name__, label)] = (statistics.mean(shows), timings)
+
+            # The set-based path adjusts counters itself; they must match a rebuild
+            observed = {other: counters(db, other) for other in (Venue, Artist)}
+            rebuild_upcoming_show_counts()
+            expected = {other: counters(db, other) for other in (Venue, Artist)}
+            drifted += [f'{other.__name__} (after {model.__name__} deletes)'
+                        for other in (Venue, Artist) if observed[other] != expected[other]]
+
+    print(f'\n{"model":<10}{"delete":<12}{"shows each":>12}{"mean ms":>12}{"max ms":>12}')
+    for (model, label), (shows, timings) in results.items():
+        print(f'{model:<10}{label:<12}{shows:>12.0f}{statistics.mean(timings) * 1000:>12.1f}'
+              f'{max(timings) * 1000:>12.1f}')
+    print('\nCounters match a rebuild.' if not drifted else f'\nCounters drifted for: {", ".join(drifted)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Micro-benchmark for the `datetime` Jinja filter.
+
+Renders the /shows grid (pages/show_tile.html per show, inside
+pages/shows.html, as the view does on a fragment cache miss) with N
+synthetic shows and times the filter on its own, comparing the original dateutil + babel implementation
+with the current one (ISO fast path, native datetimes, cached patterns).
+
+    python benchmarks/bench_datetime_filter.py [--shows 10000] [--repeat 5]
+"""
+import argparse
+import collections
+import collections.abc
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import babel.dates
+import dateutil.parser
+from flask import render_template
+from markupsafe import Markup
+
+import app as fyyur
+
+ISO_FORMAT = '%Y-%m-%dT%H:%M:%S.%fZ'
+
+# The pinned python-dateutil predates Python 3.10; let the legacy path run
+if not hasattr(collections, 'Callable'):
+    collections.Callable = collections.abc.Callable
+
+
+def legacy_format_datetime(value, format='medium'):
+    # The filter as it was before the fast path
+    date = dateutil.parser.parse(value)
+    if format == 'full':
+        format = "EEEE MMMM, d, y 'at' h:mma"
+    elif format == 'medium':
+        format = "EE MM, dd, y h:mma"
+    return babel.dates.format_datetime(date, format, locale='en')
+
+
+def make_shows(count):
+    start = datetime(2024, 1, 1, 20, 0)
+    return [{
+        "venue_id": i % 50,
+        "venue_name": f"Venue {i % 50}",
+        "artist_id": i % 200,
+        "artist_name": f"Artist {i % 200}",
+        "artist_image_link": "https://example.com/artist.jpg",
+        "start_time": (start + timedelta(hours=7 * i)).strftime(ISO_FORMAT),
+    } for i in range(count)]
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def report(label, seconds, rows):
+    print(f'{label:<44} {seconds * 1000:9.1f} ms  {seconds / rows * 1e6:8.2f} us/row')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--shows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    shows = make_shows(args.shows)
+    values = [show["start_time"] for show in shows]
+    native_values = [datetime.strptime(value, ISO_FORMAT) for value in values]
+
+    def run_filter(filter_fn, inputs):
+        return lambda: [filter_fn(value, 'full') for value in inputs]
+
+    def cold(fn):
+        # Measure the uncached formatting cost, not lru_cache hits
+        def run():
+            fyyur._format_datetime.cache_clear()
+            fn()
+        return run
+
+    print(f'{args.shows} shows, best of {args.repeat}')
+    try:
+        report('legacy filter (dateutil + babel)', best_of(args.repeat, run_filter(legacy_format_datetime, values)), args.shows)
+    except Exception as e:
+        print(f'legacy filter unavailable: {e!r}')
+    report('filter, ISO strings, cold', best_of(args.repeat, cold(run_filter(fyyur.format_datetime, values))), args.shows)
+    report('filter, native datetimes, cold', best_of(args.repeat, cold(run_filter(fyyur.format_datetime, native_values))), args.shows)
+    report('filter, native datetimes, warm', best_of(args.repeat, run_filter(fyyur.format_datetime, native_values)), args.shows)
+
+    # The view hands the tiles native datetimes
+    tile_shows = [dict(show, start_time=value) for show, value in zip(shows, native_values)]
+    tile_template = fyyur.app.jinja_env.get_template('pages/show_tile.html')
+
+    with fyyur.app.test_request_context('/shows'):
+        def render():
+            tiles = [Markup(tile_template.render(show=show)) for show in tile_shows]
+            return render_template('pages/shows.html', tiles=tiles, page=None)
+
+        assert render().count('tile-show') == args.shows
+        report('render /shows tiles + grid, cold', best_of(args.repeat, cold(render)), args.shows)
+        report('render /shows tiles + grid, warm', best_of(args.repeat, render), args.shows)
+
+
+if __name__ == '__main__':
+    main()
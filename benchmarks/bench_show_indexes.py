@@ -0,0 +1,95 @@
+"""Latency of the Show-filtering endpoints without and with the Show indexes.
+
+Seeds a synthetic dataset, then requests /shows, /venues/<id> and
+/artists/<id> through the Flask test client, first with the
+ix_Show_* indexes dropped and then with them created, and reports p50/p99
+latency for each.
+
+    python benchmarks/bench_show_indexes.py --database sqlite:////tmp/fyyur_bench.db
+    python benchmarks/bench_show_indexes.py --database postgresql://localhost/fyyur_bench --shows 500000
+
+The database is dropped and recreated; never point this at real data.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def measure(client, paths, requests):
+    timings = []
+    for path in paths(requests):
+        started = time.perf_counter()
+        response = client.get(path)
+        timings.append(time.perf_counter() - started)
+        assert response.status_code == 200, (path, response.status_code)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', default='sqlite:////tmp/fyyur_bench.db')
+    parser.add_argument('--venues', type=int, default=1000)
+    parser.add_argument('--artists', type=int, default=2000)
+    parser.add_argument('--shows', type=int, default=200000)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    # Configure the app before it is imported
+    os.environ['DATABASE_URL'] = args.database
+    os.environ['PAGE_CACHE_SIZE'] = '0'
+    os.environ['SQL_PROFILE_SAMPLE_RATE'] = '0'
+
+    import app as fyyur
+    import datagen
+    from models import db, Show
+
+    fyyur.app.jinja_env.filters['datetime'] = lambda value, format='medium': value
+    rng = random.Random(1)
+
+    with fyyur.app.app_context():
+        db.drop_all()
+        db.create_all()
+        print(f'Seeding {args.venues} venues, {args.artists} artists, {args.shows} shows...')
+        venue_ids, artist_ids = datagen.generate(venues=args.venues, artists=args.artists, shows=args.shows)
+        indexes = [index for index in Show.__table__.indexes if index.name.startswith('ix_Show_')]
+
+        endpoints = {
+            '/shows': lambda n: ['/shows'] * n,
+            '/venues/<id>': lambda n: [f'/venues/{rng.choice(venue_ids)}' for _ in range(n)],
+            '/artists/<id>': lambda n: [f'/artists/{rng.choice(artist_ids)}' for _ in range(n)],
+        }
+        client = fyyur.app.test_client()
+        results = {}
+
+        for label, create in (('without indexes', False), ('with indexes', True)):
+            for index in indexes:
+                if create:
+                    index.create(bind=db.engine)
+                else:
+                    index.drop(bind=db.engine)
+            db.session.execute('ANALYZE')
+            db.session.commit()
+            for endpoint, paths in endpoints.items():
+                measure(client, paths, 5)  # warm up
+                results[(endpoint, label)] = measure(client, paths, args.requests)
+
+    print(f'\n{"endpoint":<16}{"indexes":<18}{"p50 ms":>10}{"p99 ms":>10}{"mean ms":>10}')
+    for (endpoint, label), timings in results.items():
+        print(f'{endpoint:<16}{label:<18}{percentile(timings, 0.5) * 1000:>10.2f}'
+              f'{percentile(timings, 0.99) * 1000:>10.2f}{statistics.mean(timings) * 1000:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Synthetic data generator for the benchmarks.
+
+Fills an empty database with venues, artists and shows spread over a
+configurable number of cities and genres, using core executemany inserts,
+then rebuilds the upcoming show counters.
+"""
+import random
+from datetime import datetime, timedelta
+
+from counters import rebuild_upcoming_show_counts
+from forms import GENRE_CHOICES
+from models import db, Venue, Artist, Show
+
+STATES = ['CA', 'NY', 'TX', 'IL', 'WA', 'MA', 'GA', 'CO', 'OR', 'FL']
+BATCH_SIZE = 5000
+
+
+def _insert(table, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(table.insert(), rows[start:start + BATCH_SIZE])
+
+
+def generate(venues=1000, artists=2000, shows=50000, cities=50, genres=None,
+             past_days=365, future_days=365, seed=0):
+    """Insert synthetic rows and return the (venue_ids, artist_ids) present."""
+    rng = random.Random(seed)
+    genre_names = [genre for genre, _ in GENRE_CHOICES][:genres or len(GENRE_CHOICES)]
+    areas = [(f'City {i}', STATES[i % len(STATES)]) for i in range(cities)]
+
+    def pick_genres():
+        return rng.sample(genre_names, rng.randint(1, min(3, len(genre_names))))
+
+    venue_rows = []
+    for i in range(1, venues + 1):
+        city, state = rng.choice(areas)
+        venue_rows.append({
+            'name': f'Venue {i}',
+            'city': city,
+            'state': state,
+            'address': f'{i} Main St',
+            'phone': f'555{i:07d}',
+            'genres': pick_genres(),
+            'facebook_link': f'https://www.facebook.com/venue{i}',
+            'image_link': f'https://example.com/venues/{i}.jpg',
+            'website_link': f'https://venue{i}.example.com',
+            'seeking_talent': rng.random() < 0.3,
+            'seeking_description': 'Looking for local talent.',
+            'upcoming_shows_count': 0,
+        })
+    _insert(Venue.__table__, venue_rows)
+
+    artist_rows = []
+    for i in range(1, artists + 1):
+        city, state = rng.choice(areas)
+        artist_rows.append({
+            'name': f'Artist {i}',
+            'city': city,
+            'state': state,
+            'phone': f'555{i:07d}',
+            'genres': pick_genres(),
+            'image_link': f'https://example.com/artists/{i}.jpg',
+            'facebook_link': f'https://www.facebook.com/artist{i}',
+            'website_link': f'https://artist{i}.example.com',
+            'seeking_venue': rng.random() < 0.3,
+            'seeking_description': 'Looking for venues.',
+            'upcoming_shows_count': 0,
+        })
+    _insert(Artist.__table__, artist_rows)
+
+    venue_ids = [row.id for row in db.session.query(Venue.id)]
+    artist_ids = [row.id for row in db.session.query(Artist.id)]
+
+    now = datetime.now().replace(second=0, microsecond=0)
+    span = (past_days + future_days) * 24 * 60
+    show_rows = []
+    for _ in range(shows):
+        show_time = now - timedelta(days=past_days) + timedelta(minutes=rng.randrange(span))
+        show_rows.append({
+            'venue_id': rng.choice(venue_ids),
+            'artist_id': rng.choice(artist_ids),
+            'show_time': show_time,
+            'is_upcoming': show_time >= now,
+        })
+    _insert(Show.__table__, show_rows)
+
+    db.session.commit()
+    rebuild_upcoming_show_counts()
+    return venue_ids, artist_ids
@@ -0,0 +1,466 @@
+"""Benchmark every Fyyur route.
+
+Seeds a synthetic dataset, then drives each route in app.py
+
+  * through the Flask test client (per-request latency and SQL statement
+    counts, no network), and/or
+  * over HTTP against a threaded server with concurrent clients
+    (throughput and latency under load),
+
+and writes the results as JSON so runs on different commits can be diffed:
+
+    python benchmarks/run.py --output before.json
+    git checkout my-branch
+    python benchmarks/run.py --output after.json --compare before.json
+
+Use --database postgresql://localhost/fyyur_bench to run against a local
+Postgres. The database is dropped and recreated; never point this at real
+data.
+"""
+import argparse
+import contextlib
+import json
+import os
+import posixpath
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(timings, statuses, elapsed, statements=None):
+    summary = {
+        "requests": len(timings),
+        "errors": sum(1 for status in statuses if status >= 500),
+        "throughput_rps": round(len(timings) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(timings, 0.50) * 1000, 3),
+        "p90_ms": round(percentile(timings, 0.90) * 1000, 3),
+        "p99_ms": round(percentile(timings, 0.99) * 1000, 3),
+        "mean_ms": round(statistics.mean(timings) * 1000, 3),
+    }
+    if statements is not None:
+        summary["statements_per_request"] = round(statistics.mean(statements), 2)
+    return summary
+
+#----------------------------------------------------------------------------#
+# Requests per route.
+#
+# Each entry builds one request for its endpoint as
+# (method, path, {'data': form} or {'json': body}), plus 'headers' where the
+# route depends on them. Write routes use their own rows so they don't
+# disturb the read routes being measured.
+#----------------------------------------------------------------------------#
+
+
+class RequestFactory(object):
+
+    def __init__(self, venue_ids, artist_ids, seed=0, asset_paths=()):
+        self.rng = random.Random(seed)
+        # Fingerprinted paths under /assets; the route is skipped without a build
+        self.asset_paths = list(asset_paths)
+        self.venue_ids = venue_ids
+        self.artist_ids = artist_ids
+        # The last venues and artists are reserved for the delete routes
+        self.deletable_venue_ids = venue_ids[-max(1, len(venue_ids) // 10):]
+        self.readable_venue_ids = venue_ids[:len(venue_ids) - len(self.deletable_venue_ids)] or venue_ids
+        self.deletable_artist_ids = artist_ids[-max(1, len(artist_ids) // 10):]
+        self.readable_artist_ids = artist_ids[:len(artist_ids) - len(self.deletable_artist_ids)] or artist_ids
+        self.counter = 0
+
+    def venue_id(self):
+        return self.rng.choice(self.readable_venue_ids)
+
+    def artist_id(self):
+        return self.rng.choice(self.readable_artist_ids)
+
+    def unique(self):
+        self.counter += 1
+        return self.counter
+
+    def venue_form(self):
+        n = self.unique()
+        return {
+            'name': f'Bench Venue {n}', 'city': 'Bench City', 'state': 'CA',
+            'address': f'{n} Bench St', 'phone': '5550000000', 'genres': ['Jazz', 'Folk'],
+            'facebook_link': 'https://www.facebook.com/bench', 'image_link': '',
+            'website_link': 'https://bench.example.com', 'seeking_description': '',
+        }
+
+    def artist_form(self):
+        n = self.unique()
+        return {
+            'name': f'Bench Artist {n}', 'city': 'Bench City', 'state': 'CA',
+            'phone': '5550000000', 'genres': ['Jazz'],
+            'facebook_link': 'https://www.facebook.com/bench', 'image_link': '',
+            'website_link': 'https://bench.example.com', 'seeking_description': '',
+        }
+
+    def build(self, endpoint):
+        builder = getattr(self, f'request_{endpoint.replace(".", "_")}', None)
+        return builder() if builder else None
+
+    def request_index(self):
+        return 'GET', '/', {}
+
+    def request_venues(self):
+        return 'GET', '/venues', {}
+
+    def request_search_venues(self):
+        return 'POST', '/venues/search', {'data': {'search_term': self.rng.choice(['Venue 1', 'city', 'jazz', 'ca'])}}
+
+    def request_browse_venues(self):
+        return 'GET', f'/venues/browse?genre={self.rng.choice(["Jazz", "Folk", "Blues"])}', {}
+
+    def request_typeahead_venues(self):
+        return 'GET', '/venues/typeahead?' + urlencode({'q': self.rng.choice(["venue 1", "ven", "venue 42"])}), {}
+
+    def request_show_venue(self):
+        return 'GET', f'/venues/{self.venue_id()}', {}
+
+    def request_create_venue_form(self):
+        return 'GET', '/venues/create', {}
+
+    def request_create_venue_submission(self):
+        return 'POST', '/venues/create', {'data': self.venue_form()}
+
+    def request_delete_venue(self):
+        if not self.deletable_venue_ids:
+            return None
+        return 'DELETE', f'/venues/{self.deletable_venue_ids.pop()}', {}
+
+    def request_delete_artist(self):
+        if not self.deletable_artist_ids:
+            return None
+        return 'DELETE', f'/artists/{self.deletable_artist_ids.pop()}', {}
+
+    def request_artists(self):
+        return 'GET', '/artists', {}
+
+    def request_search_artists(self):
+        return 'POST', '/artists/search', {'data': {'search_term': self.rng.choice(['Artist 1', 'city', 'rock', 'ny'])}}
+
+    def request_browse_artists(self):
+        return 'GET', f'/artists/browse?genre=Jazz&city=City+{self.rng.randrange(3)}', {}
+
+    def request_typeahead_artists(self):
+        return 'GET', '/artists/typeahead?' + urlencode({'q': self.rng.choice(["artist 1", "art", "artist 7"])}), {}
+
+    def request_show_artist(self):
+        return 'GET', f'/artists/{self.artist_id()}', {}
+
+    def request_edit_artist(self):
+        return 'GET', f'/artists/{self.artist_id()}/edit', {}
+
+    def request_edit_artist_submission(self):
+        artist_id = self.artist_id()
+        body = dict(self.artist_form(), name=f'Artist {artist_id}', seeking_venue='y')
+        return 'POST', f'/artists/{artist_id}/edit', {'json': body}
+
+    def request_edit_venue(self):
+        return 'GET', f'/venues/{self.venue_id()}/edit', {}
+
+    def request_edit_venue_submission(self):
+        venue_id = self.venue_id()
+        body = dict(self.venue_form(), name=f'Venue {venue_id}', seeking_talent='y')
+        return 'POST', f'/venues/{venue_id}/edit', {'json': body}
+
+    def request_create_artist_form(self):
+        return 'GET', '/artists/create', {}
+
+    def request_create_artist_submission(self):
+        return 'POST', '/artists/create', {'data': self.artist_form()}
+
+    def request_shows(self):
+        return 'GET', '/shows', {}
+
+    def request_shows_calendar(self):
+        city = f'City {self.rng.randrange(3)}'
+        return 'GET', f'/shows/calendar?city={city.replace(" ", "+")}', {}
+
+    def request_create_shows(self):
+        return 'GET', '/shows/create', {}
+
+    def request_create_show_submission(self):
+        start_time = datetime.now() + timedelta(days=self.rng.randint(1, 365))
+        return 'POST', '/shows/create', {'data': {
+            'artist_id': self.artist_id(), 'venue_id': self.venue_id(),
+            'start_time': start_time.strftime('%Y-%m-%d %H:%M:%S'),
+        }}
+
+    def request_create_show_batch(self):
+        # A ten-date tour of one artist; some dates may collide with earlier runs
+        artist_id, start = self.artist_id(), datetime.now() + timedelta(days=self.rng.randint(1, 365))
+        return 'POST', '/shows/batch', {'json': {'shows': [{
+            'artist_id': artist_id, 'venue_id': self.venue_id(),
+            'start_time': (start + timedelta(days=day)).strftime('%Y-%m-%d %H:%M:%S'),
+        } for day in range(10)]}}
+
+    def request_export(self):
+        kind = self.rng.choice(['venues', 'artists', 'shows'])
+        return 'GET', f'/export/{kind}?format={self.rng.choice(["ndjson", "csv"])}', {}
+
+    def request_metrics(self):
+        return 'GET', '/metrics', {}
+
+    def request_api_v1_venues(self):
+        return 'GET', '/api/v1/venues?fields=id,name', {}
+
+    def request_api_v1_venue(self):
+        return 'GET', f'/api/v1/venues/{self.venue_id()}', {}
+
+    def request_api_v1_artists(self):
+        return 'GET', '/api/v1/artists?fields=id,name', {}
+
+    def request_api_v1_artist(self):
+        return 'GET', f'/api/v1/artists/{self.artist_id()}', {}
+
+    def request_api_v1_shows(self):
+        return 'GET', '/api/v1/shows', {}
+
+    def request_api_v1_show(self):
+        return 'GET', f'/api/v1/shows/{self.rng.randint(1, 1000)}', {}
+
+    def request_assets(self):
+        if not self.asset_paths:
+            return None
+        return 'GET', f'/assets/{self.rng.choice(self.asset_paths)}', {'headers': {'Accept-Encoding': 'br, gzip'}}
+
+
+def benchmarked_endpoints(app, factory):
+    # Every route except static files; report any route without a request builder
+    endpoints, missing = [], []
+    for rule in sorted(app.url_map.iter_rules(), key=lambda rule: rule.rule):
+        if rule.endpoint == 'static' or rule.endpoint in endpoints:
+            continue
+        if hasattr(factory, f'request_{rule.endpoint.replace(".", "_")}'):
+            endpoints.append(rule.endpoint)
+        else:
+            missing.append(rule.endpoint)
+    return endpoints, missing
+
+#----------------------------------------------------------------------------#
+# Drivers.
+#----------------------------------------------------------------------------#
+
+
+def run_test_client(app, db, endpoints, factory, requests):
+    from sqlalchemy import event
+
+    statements = [0]
+
+    def count_statement(*args):
+        statements[0] += 1
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count_statement)
+
+    client = app.test_client()
+    results = {}
+    try:
+        for endpoint in endpoints:
+            timings, statuses, counts = [], [], []
+            started = time.perf_counter()
+            for _ in range(requests):
+                built = factory.build(endpoint)
+                if built is None:
+                    break
+                method, path, kwargs = built
+                statements[0] = 0
+                request_started = time.perf_counter()
+                response = client.open(path, method=method, **kwargs)
+                response.get_data()  # drain streamed bodies inside the timing
+                timings.append(time.perf_counter() - request_started)
+                statuses.append(response.status_code)
+                counts.append(statements[0])
+            if timings:
+                results[endpoint] = summarize(timings, statuses, time.perf_counter() - started, counts)
+    finally:
+        event.remove(engine, 'before_cursor_execute', count_statement)
+    return results
+
+
+def http_request(base_url, method, path, kwargs):
+    headers = dict(kwargs.get('headers', {}))
+    data = None
+    if 'json' in kwargs:
+        data = json.dumps(kwargs['json']).encode()
+        headers['Content-Type'] = 'application/json'
+    elif 'data' in kwargs:
+        data = urlencode(kwargs['data'], doseq=True).encode()
+        headers['Content-Type'] = 'application/x-www-form-urlencoded'
+    request = urllib.request.Request(base_url + path, data=data, method=method, headers=headers)
+    try:
+        with urllib.request.urlopen(request) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def run_http(app, endpoints, factory, requests, concurrency):
+    from werkzeug.serving import make_server
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+
+    results = {}
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for endpoint in endpoints:
+                built = [factory.build(endpoint) for _ in range(requests)]
+                built = [request for request in built if request is not None]
+                if not built:
+                    continue
+
+                def timed(request):
+                    started = time.perf_counter()
+                    status = http_request(base_url, *request)
+                    return time.perf_counter() - started, status
+
+                started = time.perf_counter()
+                outcomes = list(pool.map(timed, built))
+                elapsed = time.perf_counter() - started
+                results[endpoint] = summarize([timing for timing, _ in outcomes],
+                                              [status for _, status in outcomes], elapsed)
+    finally:
+        server.shutdown()
+    return results
+
+#----------------------------------------------------------------------------#
+# Reporting.
+#----------------------------------------------------------------------------#
+
+
+def print_results(title, results, baseline=None):
+    print(f'\n{title}')
+    header = f'{"endpoint":<32}{"rps":>9}{"p50 ms":>10}{"p99 ms":>10}{"stmts":>8}{"errors":>8}'
+    if baseline:
+        header += f'{"p50 vs base":>14}'
+    print(header)
+    for endpoint, stats in results.items():
+        statements = stats.get("statements_per_request")
+        statements = f'{statements:>8.1f}' if statements is not None else f'{"-":>8}'
+        line = (f'{endpoint:<32}{stats["throughput_rps"]:>9.1f}{stats["p50_ms"]:>10.2f}'
+                f'{stats["p99_ms"]:>10.2f}{statements}{stats["errors"]:>8}')
+        base = (baseline or {}).get(endpoint)
+        if base and base["p50_ms"]:
+            line += f'{(stats["p50_ms"] / base["p50_ms"] - 1) * 100:>+13.1f}%'
+        print(line)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', default='sqlite:////tmp/fyyur_bench.db')
+    parser.add_argument('--venues', type=int, default=500)
+    parser.add_argument('--artists', type=int, default=1000)
+    parser.add_argument('--shows', type=int, default=20000)
+    parser.add_argument('--cities', type=int, default=25)
+    parser.add_argument('--genres', type=int, default=None, help='number of distinct genres (default: all)')
+    parser.add_argument('--requests', type=int, default=100, help='requests per route')
+    parser.add_argument('--mode', choices=['client', 'http', 'both'], default='both')
+    parser.add_argument('--concurrency', type=int, default=8, help='concurrent HTTP clients')
+    parser.add_argument('--only', nargs='*', help='limit the run to these endpoints')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON file from an earlier run')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    # Configure the app before it is imported
+    os.environ['DATABASE_URL'] = args.database
+    os.environ.setdefault('SQL_PROFILE_SAMPLE_RATE', '0')
+    os.environ['ASSETS_FOLDER'] = tempfile.mkdtemp(prefix='fyyur_bench_assets_')
+
+    import logging
+    import app as fyyur
+    import assets
+    import datagen
+    from models import db
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    fyyur.app.logger.setLevel(logging.ERROR)
+
+    dataset = {
+        "venues": args.venues, "artists": args.artists, "shows": args.shows,
+        "cities": args.cities, "genres": args.genres,
+    }
+    with fyyur.app.app_context():
+        db.drop_all()
+        db.create_all()
+        print(f'Seeding {dataset}...')
+        venue_ids, artist_ids = datagen.generate(seed=args.seed, **dataset)
+
+    # Serve pages and /assets as a deploy would, from a fresh `flask assets build`
+    hashed = assets.build_assets(fyyur.app.static_folder, fyyur.app.config['ASSETS_FOLDER'])
+    assets.use_manifest(hashed)
+    asset_paths = sorted(path for path in hashed.values()
+                         if posixpath.splitext(path)[1] in assets.COMPRESSIBLE_EXTENSIONS)
+
+    factory = RequestFactory(venue_ids, artist_ids, seed=args.seed, asset_paths=asset_paths)
+    endpoints, missing = benchmarked_endpoints(fyyur.app, factory)
+    if missing:
+        print(f'No request builder for: {", ".join(missing)}')
+    if args.only:
+        endpoints = [endpoint for endpoint in endpoints if endpoint in args.only]
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    report = {
+        "revision": git_revision(),
+        "database": args.database.split(':', 1)[0],
+        "dataset": dataset,
+        "requests_per_route": args.requests,
+        "concurrency": args.concurrency,
+    }
+    # The create handlers print every submission; keep that out of the report
+    with open(os.devnull, 'w') as devnull:
+        if args.mode in ('client', 'both'):
+            with contextlib.redirect_stdout(devnull):
+                report["test_client"] = run_test_client(fyyur.app, db, endpoints, factory, args.requests)
+            print_results('Flask test client (sequential)', report["test_client"], baseline.get("test_client"))
+        if args.mode in ('http', 'both'):
+            with contextlib.redirect_stdout(devnull):
+                report["http"] = run_http(fyyur.app, endpoints, factory, args.requests, args.concurrency)
+            print_results(f'HTTP ({args.concurrency} concurrent clients)', report["http"], baseline.get("http"))
+
+    shutil.rmtree(fyyur.app.config['ASSETS_FOLDER'], ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f'\nResults written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+import threading
+import time
+from collections import OrderedDict
+
+#----------------------------------------------------------------------------#
+# Page cache.
+#
+# Rendered venue and artist detail pages are kept in a per-process,
+# size-bounded LRU with a TTL, stored with the revisions (see revisions.py)
+# they were rendered at and served only while those are current, so writes
+# made by other processes are picked up too. Write handlers also invalidate
+# the affected entries explicitly. Pages read from a lagging
+# replica are not stored for `hold` seconds after their key was invalidated,
+# so the cache does not pin the pre-write version.
+#----------------------------------------------------------------------------#
+
+
+class PageCache(object):
+
+    def __init__(self, maxsize=1024, ttl=60, hold=0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hold = hold
+        self._entries = OrderedDict()
+        self._held = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def configure(self, maxsize, ttl, hold=0):
+        with self._lock:
+            self.maxsize = maxsize
+            self.ttl = ttl
+            self.hold = hold
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, maybe_stale=False):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if maybe_stale and self._held.get(key, 0) > time.monotonic():
+                return
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *keys):
+        with self._lock:
+            now = time.monotonic()
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self.invalidations += 1
+                if self.hold > 0:
+                    self._held.pop(key, None)
+                    self._held[key] = now + self.hold
+            # Entries are in expiry order; drop the ones that have expired
+            while self._held and next(iter(self._held.values())) <= now:
+                self._held.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._held.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+page_cache = PageCache()
+
+# Rendered /shows tiles, keyed by every value a tile displays, so entries never
+# need invalidating and the TTL only reclaims dead ones. Not by the venue's or
+# artist's updated_at: counter updates bump it on every show write elsewhere
+fragment_cache = PageCache()
+
+
+def venue_page_key(venue_id):
+    return ('venue', int(venue_id))
+
+
+def artist_page_key(artist_id):
+    return ('artist', int(artist_id))
+
+
+def show_tile_key(show):
+    return ('show_tile', show.id, show.show_time, show.venue_id, show.venue_name,
+            show.artist_id, show.artist_name, show.artist_image_link)
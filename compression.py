@@ -0,0 +1,91 @@
+import gzip
+import threading
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional; responses are gzipped only
+    brotli = None
+
+#----------------------------------------------------------------------------#
+# Response compression.
+#
+# Dynamic text responses (HTML pages, JSON, CSV/NDJSON that is not streamed)
+# of at least COMPRESS_MIN_SIZE bytes are compressed in an after_request
+# hook, with Brotli when the client accepts it and the `brotli` package is
+# installed, gzip otherwise. Streamed and file responses are passed through
+# untouched; static assets are compressed ahead of time (see assets.py).
+#----------------------------------------------------------------------------#
+
+COMPRESS_MIMETYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript',
+    'application/javascript', 'application/json', 'application/x-ndjson',
+    'image/svg+xml',
+}
+
+
+def available_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def compress(data, encoding, level):
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    # mtime=0 keeps the output, and so the response bytes, deterministic
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+class CompressionStats(object):
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._encodings = {}
+
+    def add(self, encoding, size, compressed_size):
+        with self._lock:
+            stats = self._encodings.setdefault(encoding, {"responses": 0, "bytes_in": 0, "bytes_out": 0})
+            stats["responses"] += 1
+            stats["bytes_in"] += size
+            stats["bytes_out"] += compressed_size
+
+    def to_dict(self):
+        with self._lock:
+            return {encoding: dict(stats, ratio=round(stats["bytes_out"] / stats["bytes_in"], 3))
+                    for encoding, stats in self._encodings.items()}
+
+
+compression_stats = CompressionStats()
+
+
+def configure_compression(app):
+    levels = {'br': app.config['COMPRESS_BROTLI_QUALITY'], 'gzip': app.config['COMPRESS_LEVEL']}
+
+    @app.after_request
+    def compress_response(response):
+        if (response.direct_passthrough or response.is_streamed
+                or response.status_code < 200 or response.status_code in (204, 206, 304)
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESS_MIMETYPES):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        size = response.calculate_content_length()
+        if size is None or size < app.config['COMPRESS_MIN_SIZE']:
+            return response
+        encoding = request.accept_encodings.best_match(available_encodings())
+        if encoding is None:
+            return response
+
+        data = response.get_data()
+        compressed = compress(data, encoding, levels[encoding])
+        if len(compressed) >= len(data):
+            return response
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        # A strong ETag names exact bytes; the compressed body is a different representation
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        compression_stats.add(encoding, len(data), len(compressed))
+        return response
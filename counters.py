@@ -0,0 +1,191 @@
+from collections import Counter
+from datetime import datetime
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import event
+
+from jobs import enqueue, job
+from models import db, Venue, Artist, Show
+from revisions import bump_revisions
+
+#----------------------------------------------------------------------------#
+# Upcoming show counters.
+#
+# Venue.upcoming_shows_count and Artist.upcoming_shows_count are maintained
+# here so that listing pages can read them without counting Show rows.
+# Show.is_upcoming records whether a show is currently included in those
+# counters; the roll-over job flips it once the show has started. Single
+# show writes queue their counter update as a job (see jobs.py) so that the
+# request does not wait on the venue and artist row locks.
+#
+# The job and the roll-over recount their venues and artists from the Show
+# rows rather than applying deltas, so they give the same result whatever
+# order they run in: a roll-over that reaches a show before its job does
+# cannot take it out of a counter it was never added to. Writers lock the
+# venue and artist rows before they read Show, so each count sees every
+# write made under the lock before it.
+#----------------------------------------------------------------------------#
+
+venues_table = Venue.__table__
+artists_table = Artist.__table__
+shows_table = Show.__table__
+
+
+def _lock_rows(connection, table, criterion):
+    # In id order, so writers that lock the same rows cannot deadlock. NO KEY
+    # UPDATE (key_share) still lets show inserts take their foreign key locks
+    connection.execute(
+        db.select([table.c.id]).where(criterion).order_by(table.c.id).with_for_update(key_share=True)
+    )
+
+
+def _recount_counters(connection, venue_ids, artist_ids):
+    # Set these venues' and artists' counters to their number of upcoming shows
+    for table, fk, ids in ((venues_table, shows_table.c.venue_id, venue_ids),
+                           (artists_table, shows_table.c.artist_id, artist_ids)):
+        if not ids:
+            continue
+        _lock_rows(connection, table, table.c.id.in_(ids))
+        upcoming_count = db.select([db.func.count(shows_table.c.id)]).where(
+            db.and_(fk == table.c.id, shows_table.c.is_upcoming.is_(True))).as_scalar()
+        connection.execute(
+            table.update().where(table.c.id.in_(ids)).values(upcoming_shows_count=upcoming_count)
+        )
+
+
+def count_inserted_shows(connection, shows):
+    # Bulk inserts bypass the mapper events below; apply their upcoming
+    # shows to the counters with one executemany per table
+    venue_deltas = Counter()
+    artist_deltas = Counter()
+    for show in shows:
+        if show['is_upcoming']:
+            venue_deltas[show['venue_id']] += 1
+            artist_deltas[show['artist_id']] += 1
+
+    for table, deltas in ((venues_table, venue_deltas), (artists_table, artist_deltas)):
+        if deltas:
+            connection.execute(
+                table.update()
+                .where(table.c.id == db.bindparam('target_id'))
+                .values(upcoming_shows_count=table.c.upcoming_shows_count + db.bindparam('delta')),
+                [{'target_id': target_id, 'delta': delta} for target_id, delta in deltas.items()]
+            )
+
+
+@event.listens_for(Show, 'before_insert')
+def _mark_upcoming(mapper, connection, show):
+    show.is_upcoming = show.show_time >= datetime.now()
+
+
+@job('adjust_upcoming_counts')
+def adjust_upcoming_counts(connection, venue_id, artist_id, delta=None):
+    # Recounts, so running it late, out of order or twice is harmless. `delta`
+    # is unused; jobs queued before counters were recounted still carry it
+    _recount_counters(connection, [venue_id], [artist_id])
+    bump_revisions(connection, 'venues', 'artists')
+
+
+@event.listens_for(Show, 'after_insert')
+def _count_on_insert(mapper, connection, show):
+    if show.is_upcoming:
+        enqueue(connection, 'adjust_upcoming_counts', venue_id=show.venue_id, artist_id=show.artist_id)
+
+
+@event.listens_for(Show, 'after_delete')
+def _uncount_on_delete(mapper, connection, show):
+    if show.is_upcoming:
+        enqueue(connection, 'adjust_upcoming_counts', venue_id=show.venue_id, artist_id=show.artist_id)
+
+
+def _subtract_counts(upcoming):
+    # Take the shows matching `upcoming` out of the venue and artist
+    # counters, with one UPDATE per table
+    connection = db.session.connection()
+    for table, fk in ((venues_table, shows_table.c.venue_id),
+                      (artists_table, shows_table.c.artist_id)):
+        affected = table.c.id.in_(db.select([fk]).where(upcoming))
+        # Count only after a roll-over holding these rows has committed, so
+        # shows it has already taken out are not subtracted again
+        _lock_rows(connection, table, affected)
+        upcoming_count = db.select([db.func.count(shows_table.c.id)]).where(
+            db.and_(fk == table.c.id, upcoming)).as_scalar()
+        connection.execute(
+            table.update()
+            .where(affected)
+            .values(upcoming_shows_count=table.c.upcoming_shows_count - upcoming_count)
+        )
+
+
+def uncount_shows(criterion):
+    # Bulk deletes skip the mapper events above; call this before deleting
+    # the shows matching `criterion`
+    _subtract_counts(db.and_(criterion, shows_table.c.is_upcoming.is_(True)))
+
+
+def roll_over_upcoming_shows(now=None):
+    # Take shows that have started since the last run out of the counters
+    now = now or datetime.now()
+    connection = db.session.connection()
+    passed = connection.execute(
+        db.select([shows_table.c.id, shows_table.c.venue_id, shows_table.c.artist_id]).where(
+            db.and_(shows_table.c.is_upcoming.is_(True), shows_table.c.show_time < now))
+    ).fetchall()
+    if not passed:
+        db.session.commit()
+        return 0
+
+    show_ids, venue_ids, artist_ids = (sorted(set(column)) for column in zip(*passed))
+    # Venue and artist rows before Show rows, in the same order as bulk deletes
+    _lock_rows(connection, venues_table, venues_table.c.id.in_(venue_ids))
+    _lock_rows(connection, artists_table, artists_table.c.id.in_(artist_ids))
+    # By id: a show committed after the select above is left to the next run,
+    # as its venue and artist are not recounted by this one
+    result = connection.execute(
+        shows_table.update()
+        .where(db.and_(shows_table.c.id.in_(show_ids), shows_table.c.is_upcoming.is_(True)))
+        .values(is_upcoming=False)
+    )
+    _recount_counters(connection, venue_ids, artist_ids)
+    # Pages split shows into past and upcoming, so they change with the roll-over
+    bump_revisions(connection, 'shows', 'venues', 'artists')
+    db.session.commit()
+    return result.rowcount
+
+
+def rebuild_upcoming_show_counts(now=None):
+    # Recompute every counter from the Show table
+    now = now or datetime.now()
+    db.session.execute(
+        shows_table.update().values(is_upcoming=shows_table.c.show_time >= now)
+    )
+
+    for table, fk in ((venues_table, shows_table.c.venue_id),
+                      (artists_table, shows_table.c.artist_id)):
+        upcoming_count = db.select([db.func.count(shows_table.c.id)]).where(
+            db.and_(fk == table.c.id, shows_table.c.is_upcoming.is_(True))).as_scalar()
+        db.session.execute(table.update().values(upcoming_shows_count=upcoming_count))
+
+    bump_revisions(db.session.connection(), 'shows', 'venues', 'artists')
+    db.session.commit()
+
+#----------------------------------------------------------------------------#
+# Commands.
+#----------------------------------------------------------------------------#
+
+counters_cli = AppGroup('counters', help='Maintain the upcoming show counters.')
+
+
+@counters_cli.command('rollover')
+def rollover_command():
+    """Move shows that have started out of the upcoming counters."""
+    rolled_over = roll_over_upcoming_shows()
+    click.echo(f'{rolled_over} show(s) rolled over.')
+
+
+@counters_cli.command('rebuild')
+def rebuild_command():
+    """Rebuild all upcoming show counters from scratch."""
+    rebuild_upcoming_show_counts()
+    click.echo('Upcoming show counters rebuilt.')
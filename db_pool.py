@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+#----------------------------------------------------------------------------#
+# Connection pool metrics.
+#
+# MeteredQueuePool is a QueuePool that times every checkout. Together with
+# the pool's own size/checked-out/overflow gauges this is served from
+# /metrics so the pool can be sized against the number of workers.
+#----------------------------------------------------------------------------#
+
+
+def _percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class CheckoutStats(object):
+
+    def __init__(self, window=1024):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.total_latency = 0.0
+        self.total_wait = 0.0
+        self.max_latency = 0.0
+
+    def record(self, latency, waited):
+        with self._lock:
+            self.checkouts += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            self._latencies.append(latency)
+            if waited:
+                self.waits += 1
+                self.total_wait += latency
+
+    def record_timeout(self, latency):
+        with self._lock:
+            self.timeouts += 1
+            self.waits += 1
+            self.total_wait += latency
+
+    def to_dict(self):
+        with self._lock:
+            latencies = list(self._latencies)
+            return {
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "total_wait_ms": round(self.total_wait * 1000, 3),
+                "checkout_latency_ms": {
+                    "mean": round(self.total_latency / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                    "p50": round(_percentile(latencies, 0.50) * 1000, 3),
+                    "p99": round(_percentile(latencies, 0.99) * 1000, 3),
+                    "max": round(self.max_latency * 1000, 3),
+                },
+            }
+
+
+class MeteredQueuePool(QueuePool):
+
+    def __init__(self, *args, **kwargs):
+        super(MeteredQueuePool, self).__init__(*args, **kwargs)
+        self.checkout_stats = CheckoutStats()
+
+    def recreate(self):
+        # Keep the counters across pool recreation (e.g. engine.dispose())
+        pool = super(MeteredQueuePool, self).recreate()
+        pool.checkout_stats = self.checkout_stats
+        return pool
+
+    def _metered_checkout(self, checkout):
+        # A checkout has to wait when no idle connection is left and the
+        # overflow is used up
+        waited = self.checkedin() == 0 and self.overflow() >= self._max_overflow > -1
+        started = time.perf_counter()
+        try:
+            connection = checkout()
+        except exc.TimeoutError:
+            self.checkout_stats.record_timeout(time.perf_counter() - started)
+            raise
+        self.checkout_stats.record(time.perf_counter() - started, waited)
+        return connection
+
+    def connect(self):
+        return self._metered_checkout(super(MeteredQueuePool, self).connect)
+
+    def unique_connection(self):
+        # The checkout path used by Engine.connect() in SQLAlchemy 1.3
+        return self._metered_checkout(super(MeteredQueuePool, self).unique_connection)
+
+def configure_pool(app):
+    # Meter the pool whenever the configuration asks for a sized QueuePool
+    options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    if 'pool_size' in options:
+        options.setdefault('poolclass', MeteredQueuePool)
+
+
+def pool_metrics(engine):
+    pool = engine.pool
+    metrics = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        metrics.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "max_overflow": pool._max_overflow,
+        })
+    if isinstance(pool, MeteredQueuePool):
+        metrics.update(pool.checkout_stats.to_dict())
+    return metrics
+
+
+def dispose_engines(app):
+    # Close the pooled connections of every engine (primary and binds), e.g.
+    # around a fork, so no two processes ever share a connection
+    db = app.extensions['sqlalchemy'].db
+    for bind in [None] + list(app.config.get('SQLALCHEMY_BINDS') or ()):
+        db.get_engine(app, bind).dispose()
@@ -0,0 +1,127 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import click
+from flask.cli import AppGroup
+
+from models import db, Venue, Artist, Show
+
+#----------------------------------------------------------------------------#
+# Catalog export.
+#
+# Rows are read through a server-side cursor (stream_results + yield_per)
+# and serialized one at a time, so memory stays flat however large the
+# tables are. Exports can be incremental: rows after a given id, or rows
+# updated at or after a given timestamp (ordered by updated_at, so a
+# consumer can resume from the last updated_at it saw). Deletions are not
+# reported.
+#----------------------------------------------------------------------------#
+
+EXPORTS = {
+    'venues': (Venue, ['id', 'name', 'city', 'state', 'address', 'phone', 'genres',
+                       'facebook_link', 'image_link', 'website_link', 'seeking_talent',
+                       'seeking_description', 'upcoming_shows_count', 'updated_at']),
+    'artists': (Artist, ['id', 'name', 'city', 'state', 'phone', 'genres', 'image_link',
+                         'facebook_link', 'website_link', 'seeking_venue',
+                         'seeking_description', 'upcoming_shows_count', 'updated_at']),
+    'shows': (Show, ['id', 'artist_id', 'venue_id', 'show_time', 'updated_at']),
+}
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+class ExportError(ValueError):
+    pass
+
+
+def parse_since(value):
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ExportError(f'Invalid timestamp {value!r}; use ISO 8601, e.g. 2024-01-31T12:00:00')
+
+
+def export_query(kind, since_id=None, since=None, batch_size=1000):
+    if kind not in EXPORTS:
+        raise ExportError(f'Unknown export {kind!r}')
+    model, fields = EXPORTS[kind]
+    query = db.session.query(*[getattr(model, field) for field in fields])
+    if since_id is not None:
+        query = query.filter(model.id > since_id)
+    if since is not None:
+        query = query.filter(model.updated_at >= since).order_by(model.updated_at, model.id)
+    else:
+        query = query.order_by(model.id)
+    return fields, query.execution_options(stream_results=True).yield_per(batch_size)
+
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _csv_value(value):
+    # Genres are joined the way the bulk importer splits them
+    if isinstance(value, list):
+        return ','.join(value)
+    return _json_value(value)
+
+
+def generate_ndjson(fields, rows):
+    for row in rows:
+        yield json.dumps({field: _json_value(value) for field, value in zip(fields, row)}) + '\n'
+
+
+def generate_csv(fields, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        chunk = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk
+
+    writer.writerow(fields)
+    yield flush()
+    for row in rows:
+        writer.writerow([_csv_value(value) for value in row])
+        yield flush()
+
+
+def generate_export(kind, format, since_id=None, since=None, batch_size=1000):
+    if format not in FORMATS:
+        raise ExportError(f'Unknown format {format!r}')
+    fields, rows = export_query(kind, since_id, since, batch_size)
+    generate = generate_ndjson if format == 'ndjson' else generate_csv
+    return generate(fields, rows)
+
+#----------------------------------------------------------------------------#
+# Commands.
+#----------------------------------------------------------------------------#
+
+export_cli = AppGroup('export', help='Export the catalog as NDJSON or CSV.')
+
+
+def add_export_command(kind):
+    @export_cli.command(kind, help=f'Stream {kind} to OUTPUT.')
+    @click.option('--format', 'format', type=click.Choice(sorted(FORMATS)), default='ndjson', show_default=True)
+    @click.option('--since-id', type=int, default=None, help='Only rows with a greater id.')
+    @click.option('--since', default=None, help='Only rows updated at or after this ISO timestamp.')
+    @click.option('--output', type=click.File('w'), default='-', help='Output file (default: stdout).')
+    @click.option('--batch-size', default=1000, show_default=True, help='Rows fetched per round trip.')
+    def command(format, since_id, since, output, batch_size):
+        try:
+            since = parse_since(since) if since else None
+        except ExportError as e:
+            raise click.BadParameter(str(e), param_hint='--since')
+        for chunk in generate_export(kind, format, since_id, since, batch_size):
+            output.write(chunk)
+
+
+for kind in EXPORTS:
+    add_export_command(kind)
@@ -13,6 +13,12 @@ def test():
         abort("Aborted at user request.")
 
 
+def bench(baseline=None):
+    # e.g. fab bench:baseline=bench_before.json
+    compare = " --compare {}".format(baseline) if baseline else ""
+    local("python benchmarks/run.py --output bench_results.json" + compare)
+
+
 def commit():
     message = raw_input("Enter a git commit message: ")
     local("git add . && git commit -am '{}'".format(message))
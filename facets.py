@@ -0,0 +1,76 @@
+from collections import defaultdict
+
+from forms import GENRE_CHOICES
+from models import db
+from search import get_backend
+
+#----------------------------------------------------------------------------#
+# Faceted browsing.
+#
+# Facet counts for venues/artists come from one statement: counts grouped
+# by (genre, city, state), unioned with counts grouped by (city, state)
+# alone so that rows with several genres are counted once per city. Every
+# facet for any combination of filters is then summed in Python from those
+# few rows.
+#----------------------------------------------------------------------------#
+
+GENRES_BY_NAME = {genre.lower(): genre for genre, _ in GENRE_CHOICES}
+
+
+def canonical_genre(name):
+    return GENRES_BY_NAME.get(name.strip().lower()) if name else None
+
+
+def facet_rows(model):
+    items, genre = get_backend().genre_items(model)
+    by_genre = db.session.query(
+        genre.label('genre'),
+        model.city,
+        model.state,
+        db.func.count().label('count')
+    ).select_from(model.__table__, items).group_by(genre, model.city, model.state)
+    by_area = db.session.query(
+        db.null().label('genre'),
+        model.city,
+        model.state,
+        db.func.count().label('count')
+    ).group_by(model.city, model.state)
+    return by_genre.union_all(by_area).all()
+
+
+def facet_counts(model, genre=None, city=None, state=None):
+    """Return genre and city facets for `model`.
+
+    Genre counts honour the city/state filters and city counts honour the
+    genre/state filters, so each facet lists the alternatives to its own
+    selection.
+    """
+    genres = defaultdict(int)
+    cities = defaultdict(int)
+    for row in facet_rows(model):
+        if state and row.state != state:
+            continue
+        if row.genre is not None and (not city or row.city == city):
+            genres[row.genre] += row.count
+        if row.genre == genre:
+            cities[(row.city, row.state)] += row.count
+
+    return {
+        "genres": [{"genre": name, "count": count}
+                   for name, count in sorted(genres.items(), key=lambda item: (-item[1], item[0]))],
+        "cities": [{"city": area_city, "state": area_state, "count": count}
+                   for (area_city, area_state), count in sorted(
+                       cities.items(), key=lambda item: (-item[1], item[0][1] or '', item[0][0] or ''))],
+    }
+
+
+def browse_query(model, columns, genre=None, city=None, state=None):
+    # The genre filter is served by the GIN index on genres in Postgres
+    query = db.session.query(*columns)
+    if genre:
+        query = query.filter(*get_backend().genre_filter(model, [genre]))
+    if city:
+        query = query.filter(model.city == city)
+    if state:
+        query = query.filter(model.state == state)
+    return query
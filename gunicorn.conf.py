@@ -0,0 +1,46 @@
+import multiprocessing
+import os
+
+#----------------------------------------------------------------------------#
+# gunicorn settings for `gunicorn -c gunicorn.conf.py wsgi:application`.
+#
+# A master process forks WEB_CONCURRENCY workers, each serving WEB_THREADS
+# requests at a time; keep WEB_THREADS <= DB_POOL_SIZE + DB_MAX_OVERFLOW.
+# Workers are replaced after WEB_MAX_REQUESTS requests (plus jitter, so
+# they do not all restart together). `kill -HUP <master>` starts new
+# workers and retires the old ones once their requests finish.
+#----------------------------------------------------------------------------#
+
+
+def _flag(name, default):
+    return os.environ.get(name, default).lower() in ('1', 'true', 'yes')
+
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5001)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# WEB_THREADS > 1 switches to threaded (gthread) workers. A gthread worker
+# that is being recycled closes connections it has accepted but not yet read,
+# so only use it behind a proxy that retries them; sync workers lose none
+threads = int(os.environ.get('WEB_THREADS', 1))
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('WEB_MAX_REQUESTS_JITTER', 100))
+timeout = int(os.environ.get('WEB_TIMEOUT', 30))  # seconds before a stuck worker is killed
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30))  # seconds to finish requests on reload/stop
+keepalive = 5
+
+# Importing the app once in the master saves memory and start-up time, but
+# then HUP reuses the master's code; leave it off to pick up a deploy with HUP
+preload_app = _flag('WEB_PRELOAD', 'false')
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    # A preloaded app's pools belong to the master; start the worker with empty ones
+    if preload_app:
+        from db_pool import dispose_engines
+        from wsgi import application
+        dispose_engines(application)
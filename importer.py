@@ -0,0 +1,229 @@
+import csv
+import json
+import time
+from datetime import datetime
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy.exc import DBAPIError
+from werkzeug.datastructures import MultiDict
+
+from counters import count_inserted_shows
+from forms import VenueForm, ArtistForm, ShowForm
+from models import db, Venue, Artist, Show
+from revisions import bump_revisions
+
+#----------------------------------------------------------------------------#
+# Bulk import.
+#
+# Rows are streamed from CSV or JSONL files, validated with the same forms
+# the create pages use, and inserted with one executemany per batch. A
+# failing batch is retried row by row so one bad row only rejects itself.
+# Rejected rows are written to an error report as JSON lines.
+#----------------------------------------------------------------------------#
+
+FALSE_VALUES = ('', '0', 'false', 'f', 'no', 'n', 'off')
+
+
+def read_rows(path):
+    # Yield (line number, row, error) for every record in a .csv or .jsonl file
+    if path.endswith('.csv'):
+        with open(path, newline='') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row, None
+        return
+
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_number, None, str(e)
+                continue
+            if not isinstance(row, dict):
+                yield line_number, None, 'Expected a JSON object'
+                continue
+            yield line_number, row, None
+
+
+def to_formdata(row, boolean_fields):
+    formdata = MultiDict()
+    for key, value in row.items():
+        if value is None:
+            continue
+        if key == 'genres' and isinstance(value, str):
+            value = [genre.strip() for genre in value.split(',') if genre.strip()]
+        if key in boolean_fields:
+            # Leave unchecked boxes out, as a browser would
+            if str(value).strip().lower() in FALSE_VALUES:
+                continue
+            value = 'y'
+        if isinstance(value, list):
+            for item in value:
+                formdata.add(key, item)
+        else:
+            formdata.add(key, str(value))
+    return formdata
+
+
+def venue_values(form):
+    return {
+        'name': form.name.data,
+        'city': form.city.data,
+        'state': form.state.data,
+        'address': form.address.data,
+        'phone': form.phone.data,
+        'genres': form.genres.data,
+        'facebook_link': form.facebook_link.data,
+        'image_link': form.image_link.data,
+        'website_link': form.website_link.data,
+        'seeking_talent': form.seeking_talent.data or False,
+        'seeking_description': form.seeking_description.data,
+        'upcoming_shows_count': 0,
+    }
+
+
+def artist_values(form):
+    return {
+        'name': form.name.data,
+        'city': form.city.data,
+        'state': form.state.data,
+        'phone': form.phone.data,
+        'genres': form.genres.data,
+        'facebook_link': form.facebook_link.data,
+        'image_link': form.image_link.data,
+        'website_link': form.website_link.data,
+        'seeking_venue': form.seeking_venue.data or False,
+        'seeking_description': form.seeking_description.data,
+        'upcoming_shows_count': 0,
+    }
+
+
+def show_values(form):
+    return {
+        'artist_id': form.artist_id.data,
+        'venue_id': form.venue_id.data,
+        'show_time': form.start_time.data,
+        'is_upcoming': form.start_time.data >= datetime.now(),
+    }
+
+
+class Importer(object):
+
+    def __init__(self, form_class, model, values, boolean_fields=(), after_insert=None, revisions=()):
+        self.form_class = form_class
+        self.table = model.__table__
+        self.values = values
+        self.boolean_fields = boolean_fields
+        self.after_insert = after_insert
+        self.revisions = revisions
+
+    def insert(self, rows):
+        connection = db.session.connection()
+        connection.execute(self.table.insert(), rows)
+        if self.after_insert:
+            self.after_insert(connection, rows)
+        bump_revisions(connection, *self.revisions)
+        db.session.commit()
+
+    def flush(self, batch, report):
+        # Insert a batch in one transaction; isolate bad rows on failure
+        try:
+            self.insert([values for _, values in batch])
+            return len(batch)
+        except DBAPIError:
+            db.session.rollback()
+
+        inserted = 0
+        for line_number, values in batch:
+            try:
+                self.insert([values])
+                inserted += 1
+            except DBAPIError as e:
+                db.session.rollback()
+                report(line_number, values, {'database': [str(e.orig)]})
+        return inserted
+
+    def run(self, path, batch_size, report):
+        form = self.form_class(formdata=None, meta={'csrf': False})
+        batch = []
+        inserted = rejected = 0
+
+        def reject(line_number, row, errors):
+            nonlocal rejected
+            rejected += 1
+            report(line_number, row, errors)
+
+        for line_number, row, error in read_rows(path):
+            if error:
+                reject(line_number, None, {'row': [error]})
+                continue
+
+            # Reuse one form instance; process() rebinds it to the new row
+            form.process(to_formdata(row, self.boolean_fields))
+            if not form.validate():
+                reject(line_number, row, form.errors)
+                continue
+
+            batch.append((line_number, self.values(form)))
+            if len(batch) >= batch_size:
+                flushed = self.flush(batch, reject)
+                inserted += flushed
+                batch = []
+
+        if batch:
+            inserted += self.flush(batch, reject)
+        return inserted, rejected
+
+
+IMPORTERS = {
+    'venues': Importer(VenueForm, Venue, venue_values, boolean_fields=('seeking_talent',),
+                       revisions=('venues', 'venue_names')),
+    'artists': Importer(ArtistForm, Artist, artist_values, boolean_fields=('seeking_venue',),
+                        revisions=('artists', 'artist_names')),
+    # Show inserts also move the venue and artist upcoming counters
+    'shows': Importer(ShowForm, Show, show_values, after_insert=count_inserted_shows,
+                      revisions=('shows', 'venues', 'artists')),
+}
+
+#----------------------------------------------------------------------------#
+# Commands.
+#----------------------------------------------------------------------------#
+
+import_cli = AppGroup('import', help='Bulk import venues, artists and shows.')
+
+
+def import_file(kind, path, batch_size, errors_path):
+    errors_path = errors_path or f'{path}.errors.jsonl'
+    started = time.perf_counter()
+
+    with open(errors_path, 'w') as errors_file:
+        def report(line_number, row, errors):
+            errors_file.write(json.dumps(
+                {'line': line_number, 'row': row, 'errors': errors}, default=str) + '\n')
+
+        inserted, rejected = IMPORTERS[kind].run(path, batch_size, report)
+
+    elapsed = time.perf_counter() - started
+    click.echo(f'Imported {inserted} {kind} in {elapsed:.2f}s '
+               f'({inserted / elapsed if elapsed else 0:.0f} rows/s).')
+    if rejected:
+        click.echo(f'{rejected} row(s) rejected; see {errors_path}.')
+
+
+def add_import_command(kind):
+    @import_cli.command(kind, help=f'Import {kind} from a .csv or .jsonl file at PATH.')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--batch-size', default=1000, show_default=True,
+                  help='Rows inserted and committed per batch.')
+    @click.option('--errors', 'errors_path', default=None,
+                  help='Error report file (defaults to PATH.errors.jsonl).')
+    def command(path, batch_size, errors_path):
+        import_file(kind, path, batch_size, errors_path)
+
+
+for kind in IMPORTERS:
+    add_import_command(kind)
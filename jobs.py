@@ -0,0 +1,218 @@
+import os
+import signal
+import socket
+import time
+import traceback
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from models import db, Job
+
+#----------------------------------------------------------------------------#
+# Background jobs.
+#
+# Side-effects of a write are queued as rows in the Job table, inserted on
+# the request's own connection so that they commit or roll back with it,
+# and run later by `flask jobs work`. A worker claims a batch by stamping
+# it with a claim token and a visibility timeout; a job whose worker dies
+# becomes runnable again once the timeout passes. Each job runs in its own
+# transaction together with the delete of its row, so its effects are
+# applied once even if it was claimed twice. Failed jobs are retried with
+# exponential backoff until max_attempts, then left with status 'failed'.
+#----------------------------------------------------------------------------#
+
+jobs_table = Job.__table__
+
+JOBS = {}
+
+
+def job(name):
+    """Register `handler(connection, **payload)` as the job called `name`."""
+    def decorator(handler):
+        JOBS[name] = handler
+        return handler
+    return decorator
+
+
+def enqueue(connection, name, **payload):
+    # Safe to call from mapper events: only Core statements on `connection`
+    if name not in JOBS:
+        raise KeyError(f'Unknown job {name!r}')
+    if current_app.config.get('JOBS_EAGER'):
+        # Local development and tests: run in the request's transaction
+        JOBS[name](connection, **payload)
+        return
+    connection.execute(jobs_table.insert().values(
+        name=name,
+        payload=payload,
+        status='pending',
+        attempts=0,
+        max_attempts=current_app.config.get('JOB_MAX_ATTEMPTS', 5),
+        run_at=datetime.now(),
+    ))
+
+
+def queue_stats():
+    rows = db.session.query(
+        Job.status, db.func.count(Job.id), db.func.min(Job.run_at)
+    ).group_by(Job.status).all()
+    return {status: {"count": count, "oldest_run_at": oldest.isoformat()}
+            for status, count, oldest in rows}
+
+
+class LostClaim(Exception):
+    """Another worker reclaimed the job after its visibility timeout."""
+
+
+class Worker(object):
+
+    def __init__(self, engine, batch_size=100, visibility_timeout=60, retry_delay=10, logger=None):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.visibility_timeout = visibility_timeout
+        self.retry_delay = retry_delay
+        self.logger = logger or current_app.logger
+        self.id = f'{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}'
+        self.claims = 0
+        self.stopping = False
+
+    def claim(self, now=None):
+        # Mark up to batch_size runnable jobs as ours; SKIP LOCKED keeps
+        # concurrent workers on Postgres from waiting on each other's rows
+        now = now or datetime.now()
+        self.claims += 1
+        token = f'{self.id}:{self.claims}'
+        runnable = db.select([jobs_table.c.id]).where(db.and_(
+            jobs_table.c.status == 'pending',
+            jobs_table.c.run_at <= now,
+            db.or_(jobs_table.c.locked_until.is_(None), jobs_table.c.locked_until < now),
+        )).order_by(jobs_table.c.run_at, jobs_table.c.id).limit(self.batch_size).with_for_update(skip_locked=True)
+
+        with self.engine.begin() as connection:
+            connection.execute(
+                jobs_table.update()
+                .where(jobs_table.c.id.in_(runnable))
+                .values(locked_by=token,
+                        locked_until=now + timedelta(seconds=self.visibility_timeout),
+                        attempts=jobs_table.c.attempts + 1)
+            )
+            claimed = connection.execute(
+                db.select([jobs_table]).where(jobs_table.c.locked_by == token).order_by(jobs_table.c.id)
+            ).fetchall()
+        return token, claimed
+
+    def run(self, token, claimed_job):
+        if claimed_job.attempts > claimed_job.max_attempts:
+            # Claimed again after its last attempt timed out, e.g. the worker was killed
+            self.fail(token, claimed_job, 'Visibility timeout expired on the last attempt')
+            return False
+
+        try:
+            with self.engine.begin() as connection:
+                JOBS[claimed_job.name](connection, **claimed_job.payload)
+                done = connection.execute(jobs_table.delete().where(db.and_(
+                    jobs_table.c.id == claimed_job.id, jobs_table.c.locked_by == token)))
+                if not done.rowcount:
+                    raise LostClaim()
+            return True
+        except LostClaim:
+            self.logger.warning('Job %s was reclaimed by another worker; its effects were rolled back',
+                                claimed_job.id)
+            return False
+        except Exception:
+            self.fail(token, claimed_job, traceback.format_exc())
+            return False
+
+    def fail(self, token, claimed_job, error):
+        if claimed_job.attempts >= claimed_job.max_attempts:
+            values = {'status': 'failed'}
+            self.logger.error('Job %s (%s) failed after %s attempt(s)',
+                              claimed_job.id, claimed_job.name, claimed_job.attempts)
+        else:
+            delay = self.retry_delay * 2 ** (claimed_job.attempts - 1)
+            values = {'run_at': datetime.now() + timedelta(seconds=delay)}
+            self.logger.warning('Job %s (%s) failed, retrying in %ss',
+                                claimed_job.id, claimed_job.name, delay)
+
+        with self.engine.begin() as connection:
+            connection.execute(
+                jobs_table.update()
+                .where(db.and_(jobs_table.c.id == claimed_job.id, jobs_table.c.locked_by == token))
+                .values(locked_by=None, locked_until=None, last_error=error, **values)
+            )
+
+    def work_once(self):
+        token, claimed = self.claim()
+        succeeded = 0
+        for claimed_job in claimed:
+            succeeded += self.run(token, claimed_job)
+        return len(claimed), succeeded
+
+    def work(self, poll_interval=1.0):
+        # Drain the queue, sleeping only when it is empty; SIGTERM stops
+        # the worker after the current batch
+        signal.signal(signal.SIGTERM, self.stop)
+        while not self.stopping:
+            claimed, _ = self.work_once()
+            if not claimed:
+                time.sleep(poll_interval)
+
+    def stop(self, *args):
+        self.stopping = True
+
+
+def make_worker(batch_size=None):
+    config = current_app.config
+    return Worker(
+        db.engine,
+        batch_size=batch_size or config.get('JOB_BATCH_SIZE', 100),
+        visibility_timeout=config.get('JOB_VISIBILITY_TIMEOUT', 60),
+        retry_delay=config.get('JOB_RETRY_DELAY', 10),
+    )
+
+#----------------------------------------------------------------------------#
+# Commands.
+#----------------------------------------------------------------------------#
+
+jobs_cli = AppGroup('jobs', help='Run and inspect background jobs.')
+
+
+@jobs_cli.command('work')
+@click.option('--once', is_flag=True, help='Run one batch of runnable jobs and exit.')
+@click.option('--batch-size', type=int, default=None, help='Jobs claimed per batch.')
+@click.option('--poll-interval', type=float, default=None, help='Seconds to sleep when the queue is empty.')
+def work_command(once, batch_size, poll_interval):
+    """Run queued jobs until stopped."""
+    worker = make_worker(batch_size)
+    if once:
+        claimed, succeeded = worker.work_once()
+        click.echo(f'{succeeded} of {claimed} job(s) succeeded.')
+        return
+    click.echo(f'Worker {worker.id} started.')
+    worker.work(poll_interval or current_app.config.get('JOB_POLL_INTERVAL', 1.0))
+
+
+@jobs_cli.command('status')
+def status_command():
+    """Show the number of pending and failed jobs."""
+    stats = queue_stats()
+    for status in ('pending', 'failed'):
+        if status in stats:
+            click.echo(f"{status}: {stats[status]['count']} (oldest {stats[status]['oldest_run_at']})")
+        else:
+            click.echo(f'{status}: 0')
+
+
+@jobs_cli.command('retry')
+def retry_command():
+    """Queue every failed job again."""
+    result = db.session.execute(
+        jobs_table.update().where(jobs_table.c.status == 'failed')
+        .values(status='pending', attempts=0, run_at=datetime.now(), locked_by=None, locked_until=None)
+    )
+    db.session.commit()
+    click.echo(f'{result.rowcount} job(s) queued again.')
@@ -0,0 +1,39 @@
+"""add upcoming show counters
+
+Revision ID: 3f1c9a7d2b40
+Revises: 6ca6ef0105e8
+Create Date: 2026-10-18 10:12:41.203118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c9a7d2b40'
+down_revision = '6ca6ef0105e8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('Venue', sa.Column('upcoming_shows_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('Artist', sa.Column('upcoming_shows_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('Show', sa.Column('is_upcoming', sa.Boolean(), server_default=sa.true(), nullable=False))
+
+    # Backfill the counters from the existing shows
+    op.execute('UPDATE "Show" SET is_upcoming = (show_time >= CURRENT_TIMESTAMP)')
+    op.execute(
+        'UPDATE "Venue" SET upcoming_shows_count = '
+        '(SELECT count(*) FROM "Show" WHERE "Show".venue_id = "Venue".id AND "Show".is_upcoming)'
+    )
+    op.execute(
+        'UPDATE "Artist" SET upcoming_shows_count = '
+        '(SELECT count(*) FROM "Show" WHERE "Show".artist_id = "Artist".id AND "Show".is_upcoming)'
+    )
+
+
+def downgrade():
+    op.drop_column('Show', 'is_upcoming')
+    op.drop_column('Artist', 'upcoming_shows_count')
+    op.drop_column('Venue', 'upcoming_shows_count')
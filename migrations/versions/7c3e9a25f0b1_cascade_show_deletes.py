@@ -0,0 +1,29 @@
+"""cascade show deletes
+
+Revision ID: 7c3e9a25f0b1
+Revises: d2f47b91e6a8
+Create Date: 2026-10-18 18:10:36.452097
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c3e9a25f0b1'
+down_revision = 'd2f47b91e6a8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Deleting a venue or artist deletes its shows in the database
+    for column, referred in (('venue_id', 'Venue'), ('artist_id', 'Artist')):
+        op.drop_constraint(f'Show_{column}_fkey', 'Show', type_='foreignkey')
+        op.create_foreign_key(f'Show_{column}_fkey', 'Show', referred, [column], ['id'], ondelete='CASCADE')
+
+
+def downgrade():
+    for column, referred in (('venue_id', 'Venue'), ('artist_id', 'Artist')):
+        op.drop_constraint(f'Show_{column}_fkey', 'Show', type_='foreignkey')
+        op.create_foreign_key(f'Show_{column}_fkey', 'Show', referred, [column], ['id'])
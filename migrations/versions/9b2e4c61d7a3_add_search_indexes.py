@@ -0,0 +1,32 @@
+"""add search indexes
+
+Revision ID: 9b2e4c61d7a3
+Revises: 3f1c9a7d2b40
+Create Date: 2026-10-18 11:03:17.846022
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b2e4c61d7a3'
+down_revision = '3f1c9a7d2b40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table in ('Venue', 'Artist'):
+        for column in ('name', 'city', 'state'):
+            op.create_index(f'ix_{table}_{column}_trgm', table, [column], unique=False,
+                            postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'})
+        op.create_index(f'ix_{table}_genres', table, ['genres'], unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    for table in ('Artist', 'Venue'):
+        op.drop_index(f'ix_{table}_genres', table_name=table)
+        for column in ('state', 'city', 'name'):
+            op.drop_index(f'ix_{table}_{column}_trgm', table_name=table)
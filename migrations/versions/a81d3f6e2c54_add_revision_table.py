@@ -0,0 +1,29 @@
+"""add revision table
+
+Revision ID: a81d3f6e2c54
+Revises: 5e8a0b3c9f17
+Create Date: 2026-10-18 16:02:47.118305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a81d3f6e2c54'
+down_revision = '5e8a0b3c9f17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    revision_table = op.create_table('Revision',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(revision_table, [{'name': name, 'version': 0} for name in ('venues', 'artists', 'shows')])
+
+
+def downgrade():
+    op.drop_table('Revision')
@@ -0,0 +1,28 @@
+"""add show time indexes
+
+Revision ID: c47d15e08a92
+Revises: 9b2e4c61d7a3
+Create Date: 2026-10-18 13:26:54.117930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47d15e08a92'
+down_revision = '9b2e4c61d7a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_Show_venue_id_show_time', 'Show', ['venue_id', 'show_time'], unique=False)
+    op.create_index('ix_Show_artist_id_show_time', 'Show', ['artist_id', 'show_time'], unique=False)
+    op.create_index('ix_Show_show_time', 'Show', ['show_time'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_Show_show_time', table_name='Show')
+    op.drop_index('ix_Show_artist_id_show_time', table_name='Show')
+    op.drop_index('ix_Show_venue_id_show_time', table_name='Show')
@@ -0,0 +1,26 @@
+"""add venue area index
+
+Revision ID: e5b8c2a41f63
+Revises: 7c3e9a25f0b1
+Create Date: 2026-10-18 15:02:11.408216
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b8c2a41f63'
+down_revision = '7c3e9a25f0b1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Matches the ORDER BY of /venues: coalesce(state, ''), coalesce(city, ''), id
+    op.create_index('ix_Venue_area', 'Venue',
+                    [sa.text("coalesce(state, '')"), sa.text("coalesce(city, '')"), 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_Venue_area', table_name='Venue')
@@ -0,0 +1,26 @@
+"""add name revisions
+
+Revision ID: f3a6d9b07c25
+Revises: e5b8c2a41f63
+Create Date: 2026-10-18 15:40:37.912054
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a6d9b07c25'
+down_revision = 'e5b8c2a41f63'
+branch_labels = None
+depends_on = None
+
+revision_table = sa.table('Revision', sa.column('name', sa.String), sa.column('version', sa.Integer))
+
+
+def upgrade():
+    op.bulk_insert(revision_table, [{'name': name, 'version': 0} for name in ('venue_names', 'artist_names')])
+
+
+def downgrade():
+    op.execute(revision_table.delete().where(revision_table.c.name.in_(['venue_names', 'artist_names'])))
@@ -1,7 +1,21 @@
-from flask_sqlalchemy import SQLAlchemy
+from datetime import datetime
+
+from sqlalchemy import event
 from sqlalchemy.dialects.postgresql import ARRAY
 
-db = SQLAlchemy()
+from routing import RoutingSQLAlchemy
+
+# GET requests read from a replica when SQLALCHEMY_REPLICA_URIS is set (see routing.py)
+db = RoutingSQLAlchemy()
+
+# Postgres stores genres as a native array; SQLite (local development) as JSON
+Genres = ARRAY(db.String).with_variant(db.JSON(), 'sqlite')
+
+
+def trigram_index(name, column):
+    # GIN trigram index used by the Postgres search backend in search.py
+    return db.Index(name, column, postgresql_using='gin',
+                    postgresql_ops={column: 'gin_trgm_ops'})
 
 #----------------------------------------------------------------------------#
 # Models.
@@ -9,6 +23,12 @@ db = SQLAlchemy()
 
 class Venue(db.Model):
     __tablename__ = 'Venue'
+    __table_args__ = (
+        trigram_index('ix_Venue_name_trgm', 'name'),
+        trigram_index('ix_Venue_city_trgm', 'city'),
+        trigram_index('ix_Venue_state_trgm', 'state'),
+        db.Index('ix_Venue_genres', 'genres', postgresql_using='gin'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String, nullable=False)
@@ -16,50 +36,125 @@ class Venue(db.Model):
     state = db.Column(db.String(120))
     address = db.Column(db.String(120))
     phone = db.Column(db.String(120))
-    genres = db.Column(db.ARRAY(db.String), nullable=False)  # To store genres as a comma-separated string
+    genres = db.Column(Genres, nullable=False)
     facebook_link = db.Column(db.String(120), nullable=True)
     image_link = db.Column(db.String(500), nullable=True)
     website_link = db.Column(db.String(500), nullable=True)
     seeking_talent = db.Column(db.Boolean, default=False)  # Boolean to indicate if seeking talent
     seeking_description = db.Column(db.String(500), nullable=True)
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Maintained by counters.py
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now, onupdate=datetime.now,
+                           server_default=db.func.now(), index=True)
 
     # Relationship with Show model
-    shows = db.relationship('Show', backref='venue', lazy=True)
+    # Shows are removed by ON DELETE CASCADE rather than loaded and deleted one by one
+    shows = db.relationship('Show', backref='venue', lazy=True, passive_deletes=True)
 
     def num_upcoming_shows(self):
-        # Implement the logic to count upcoming shows
-        return Show.query.filter(Show.venue_id == self.id).count()
+        # Read the maintained counter instead of counting Show rows
+        return self.upcoming_shows_count
 
     def __repr__(self):
         return f'<Venue {self.name}, City: {self.city}, State: {self.state}>'
 
 
+def area_key(column):
+    # coalesce(column, '') with the '' inlined rather than bound, so the query
+    # text matches the ix_Venue_area expressions on every backend
+    return db.func.coalesce(column, db.literal_column("''"))
+
+
+# /venues pages through venues by area (state, city) then id
+db.Index('ix_Venue_area', area_key(Venue.state), area_key(Venue.city), Venue.id)
+
+
 class Artist(db.Model):
     __tablename__ = 'Artist'
+    __table_args__ = (
+        trigram_index('ix_Artist_name_trgm', 'name'),
+        trigram_index('ix_Artist_city_trgm', 'city'),
+        trigram_index('ix_Artist_state_trgm', 'state'),
+        db.Index('ix_Artist_genres', 'genres', postgresql_using='gin'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String, nullable=False)
     city = db.Column(db.String(120))
     state = db.Column(db.String(120))
     phone = db.Column(db.String(120))
-    genres = db.Column(db.ARRAY(db.String), nullable=False)
+    genres = db.Column(Genres, nullable=False)
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
     website_link = db.Column(db.String(120))
     seeking_venue = db.Column(db.Boolean, default=False)
     seeking_description = db.Column(db.String(500), nullable=True)
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Maintained by counters.py
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now, onupdate=datetime.now,
+                           server_default=db.func.now(), index=True)
 
     # Relationship with Show model
-    shows = db.relationship('Show', backref='artist', lazy=True)
+    # Shows are removed by ON DELETE CASCADE rather than loaded and deleted one by one
+    shows = db.relationship('Show', backref='artist', lazy=True, passive_deletes=True)
 
 
 class Show(db.Model):
     __tablename__ = 'Show'
+    __table_args__ = (
+        # Detail pages filter by venue/artist and split on show_time;
+        # /shows pages through show_time
+        db.Index('ix_Show_venue_id_show_time', 'venue_id', 'show_time'),
+        db.Index('ix_Show_artist_id_show_time', 'artist_id', 'show_time'),
+        db.Index('ix_Show_show_time', 'show_time'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    artist_id = db.Column(db.Integer, db.ForeignKey('Artist.id'), nullable=False)
-    venue_id = db.Column(db.Integer, db.ForeignKey('Venue.id'), nullable=False)
+    artist_id = db.Column(db.Integer, db.ForeignKey('Artist.id', ondelete='CASCADE'), nullable=False)
+    venue_id = db.Column(db.Integer, db.ForeignKey('Venue.id', ondelete='CASCADE'), nullable=False)
     show_time = db.Column(db.DateTime, nullable=False)
+    is_upcoming = db.Column(db.Boolean, nullable=False, default=True, server_default=db.true())  # Counted in upcoming_shows_count
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now, onupdate=datetime.now,
+                           server_default=db.func.now(), index=True)
 
     def __repr__(self):
         return f'<Show {self.id}: {self.artist.name} at {self.venue.name} on {self.show_time.strftime("%A %B %d, %Y at %I:%M %p")}>'
+
+
+class Revision(db.Model):
+    __tablename__ = 'Revision'
+
+    # One row per table ('venues', 'artists', 'shows'), bumped by revisions.py on every write,
+    # and one per name list ('venue_names', 'artist_names'), bumped when names are added, changed or removed
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+REVISION_NAMES = ('venues', 'artists', 'shows', 'venue_names', 'artist_names')
+
+
+@event.listens_for(Revision.__table__, 'after_create')
+def _seed_revisions(table, connection, **kw):
+    connection.execute(table.insert(), [{'name': name, 'version': 0} for name in REVISION_NAMES])
+
+
+class Job(db.Model):
+    __tablename__ = 'Job'
+    __table_args__ = (
+        # Workers claim the oldest runnable jobs first
+        db.Index('ix_Job_status_run_at', 'status', 'run_at'),
+    )
+
+    # Background work queued by jobs.py and run by `flask jobs work`
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # 'pending' or 'failed'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    locked_by = db.Column(db.String(64), nullable=True)
+    locked_until = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    def __repr__(self):
+        return f'<Job {self.id}: {self.name} ({self.status})>'
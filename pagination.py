@@ -0,0 +1,129 @@
+import base64
+import json
+from datetime import datetime
+
+from flask import current_app, request
+
+from models import db
+
+#----------------------------------------------------------------------------#
+# Keyset pagination.
+#
+# Pages are addressed by the sort key of their first/last row rather than by
+# an OFFSET, so fetching any page costs the same index range scan no matter
+# how deep into the table it is.
+#----------------------------------------------------------------------------#
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class Page(object):
+
+    def __init__(self, items, next_cursor, prev_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    def to_dict(self):
+        return {
+            "next": self.next_cursor,
+            "prev": self.prev_cursor,
+        }
+
+
+def encode_cursor(values, direction):
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    payload = json.dumps({"v": values, "d": direction}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, keys):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        values, direction = payload["v"], payload["d"]
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursor(cursor)
+    if direction not in ('next', 'prev') or not isinstance(values, list) or len(values) != len(keys):
+        raise InvalidCursor(cursor)
+
+    try:
+        decoded = [_decode_value(key.type, value) if value is not None else None
+                   for key, value in zip(keys, values)]
+    except (TypeError, ValueError):
+        raise InvalidCursor(cursor)
+    return decoded, direction
+
+
+def _decode_value(type_, value):
+    # Values are bound against the key columns; a mistyped one would otherwise
+    # surface as a database error instead of a bad request
+    if isinstance(type_, db.DateTime):
+        return datetime.fromisoformat(value)
+    if isinstance(type_, db.Integer) and (not isinstance(value, int) or isinstance(value, bool)):
+        raise TypeError(value)
+    if isinstance(type_, db.String) and not isinstance(value, str):
+        raise TypeError(value)
+    return value
+
+
+def _after(keys, values):
+    # Row-value comparison (k1, k2, ...) > (v1, v2, ...) spelled out portably
+    key, value = keys[0], values[0]
+    if len(keys) == 1:
+        return key > value
+    return db.or_(key > value, db.and_(key == value, _after(keys[1:], values[1:])))
+
+
+def _before(keys, values):
+    key, value = keys[0], values[0]
+    if len(keys) == 1:
+        return key < value
+    return db.or_(key < value, db.and_(key == value, _before(keys[1:], values[1:])))
+
+
+def page_size_arg():
+    # Page size requested with ?per_page=, bounded by MAX_PAGE_SIZE
+    default = current_app.config.get('PAGE_SIZE', 50)
+    maximum = current_app.config.get('MAX_PAGE_SIZE', 500)
+    per_page = request.args.get('per_page', default, type=int)
+    return max(1, min(per_page, maximum))
+
+
+def paginate(query, keys, cursor=None, page_size=50):
+    """Return one Page of `query` ordered ascending by `keys`.
+
+    `keys` must be unique together (end them with a primary key) and each
+    must be selected by `query` under its own `.key` name, so the cursor
+    can be read back off the rows.
+    """
+    direction = 'next'
+    if cursor:
+        values, direction = decode_cursor(cursor, keys)
+        query = query.filter(_after(keys, values) if direction == 'next' else _before(keys, values))
+
+    if direction == 'next':
+        query = query.order_by(*keys)
+    else:
+        query = query.order_by(*[key.desc() for key in keys])
+
+    rows = query.limit(page_size + 1).all()
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if direction == 'prev':
+        rows.reverse()
+
+    def cursor_for(row, towards):
+        return encode_cursor([getattr(row, key.key) for key in keys], towards)
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if direction == 'next':
+            next_cursor = cursor_for(rows[-1], 'next') if has_more else None
+            prev_cursor = cursor_for(rows[0], 'prev') if cursor else None
+        else:
+            next_cursor = cursor_for(rows[-1], 'next')
+            prev_cursor = cursor_for(rows[0], 'prev') if has_more else None
+
+    return Page(rows, next_cursor, prev_cursor)
@@ -0,0 +1,127 @@
+import heapq
+import json
+import random
+import threading
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+#----------------------------------------------------------------------------#
+# SQL profiler.
+#
+# A sampled fraction of requests records every statement they execute
+# through SQLAlchemy engine events. Sampled responses carry a Server-Timing
+# header, a structured log line is written for each of them, and totals are
+# aggregated per endpoint for /metrics. Unsampled requests only pay for a
+# flag check per statement.
+#----------------------------------------------------------------------------#
+
+
+class RequestProfile(object):
+
+    def __init__(self, slowest):
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.db_time = 0.0
+        self.slowest = []  # min-heap of (duration, sql), at most `slowest` long
+        self.keep = slowest
+
+    def record(self, statement, duration):
+        self.statements += 1
+        self.db_time += duration
+        if len(self.slowest) < self.keep:
+            heapq.heappush(self.slowest, (duration, statement))
+        elif duration > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, (duration, statement))
+
+    def slowest_statements(self):
+        return [{"ms": round(duration * 1000, 3), "sql": statement}
+                for duration, statement in sorted(self.slowest, reverse=True)]
+
+
+class EndpointStats(object):
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def add(self, endpoint, profile):
+        with self._lock:
+            stats = self._endpoints.setdefault(endpoint, {
+                "requests": 0, "statements": 0, "db_ms": 0.0, "max_db_ms": 0.0, "slowest": []})
+            db_ms = profile.db_time * 1000
+            stats["requests"] += 1
+            stats["statements"] += profile.statements
+            stats["db_ms"] += db_ms
+            stats["max_db_ms"] = max(stats["max_db_ms"], db_ms)
+            slowest = stats["slowest"] + profile.slowest_statements()
+            stats["slowest"] = sorted(slowest, key=lambda item: item["ms"], reverse=True)[:profile.keep]
+
+    def to_dict(self):
+        with self._lock:
+            return {endpoint: {
+                "requests": stats["requests"],
+                "statements_per_request": round(stats["statements"] / stats["requests"], 2),
+                "db_ms_per_request": round(stats["db_ms"] / stats["requests"], 3),
+                "max_db_ms": round(stats["max_db_ms"], 3),
+                "slowest": stats["slowest"],
+            } for endpoint, stats in self._endpoints.items()}
+
+
+endpoint_stats = EndpointStats()
+
+
+def _current_profile():
+    if not has_request_context():
+        return None
+    return g.get('sql_profile')
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile() is not None:
+        conn.info.setdefault('sql_profile_started', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile()
+    if profile is not None and conn.info.get('sql_profile_started'):
+        profile.record(statement, time.perf_counter() - conn.info['sql_profile_started'].pop())
+
+
+def init_profiler(app):
+
+    @app.before_request
+    def start_sql_profile():
+        sample_rate = app.config.get('SQL_PROFILE_SAMPLE_RATE', 0.0)
+        if sample_rate and random.random() < sample_rate:
+            g.sql_profile = RequestProfile(app.config.get('SQL_PROFILE_SLOWEST', 3))
+
+    @app.after_request
+    def finish_sql_profile(response):
+        profile = g.pop('sql_profile', None)
+        if profile is None:
+            return response
+
+        endpoint = request.endpoint or 'unknown'
+        total_ms = (time.perf_counter() - profile.started) * 1000
+        db_ms = profile.db_time * 1000
+        response.headers.add('Server-Timing', f'db;dur={db_ms:.3f};desc="{profile.statements} queries"')
+        response.headers.add('Server-Timing', f'app;dur={total_ms:.3f}')
+
+        endpoint_stats.add(endpoint, profile)
+        app.logger.info(json.dumps({
+            "event": "sql_profile",
+            "endpoint": endpoint,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "statements": profile.statements,
+            "db_ms": round(db_ms, 3),
+            "total_ms": round(total_ms, 3),
+            "slowest": profile.slowest_statements(),
+        }))
+        return response
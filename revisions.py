@@ -0,0 +1,118 @@
+import hashlib
+from functools import wraps
+
+from flask import current_app, g, make_response, request, session
+from sqlalchemy import event, inspect
+
+from models import db, Venue, Artist, Show, Revision
+
+#----------------------------------------------------------------------------#
+# Change revisions and conditional GET.
+#
+# Every flush that writes a Venue, Artist or Show bumps that table's row in
+# Revision inside the same transaction; bulk paths that bypass the ORM call
+# bump_revisions() themselves. Cacheable views are wrapped in
+# @conditional(...) with the tables they read: their ETag is derived from
+# those versions, so a matching If-None-Match is answered with 304 after a
+# single primary key lookup, before the view runs.
+#----------------------------------------------------------------------------#
+
+REVISION_MODELS = {
+    Venue: 'venues',
+    Artist: 'artists',
+    Show: 'shows',
+}
+
+# The typeahead indexes only depend on names, so they follow revisions that
+# are bumped when a row is inserted or deleted or its name changes, not on
+# every write (counter updates alone touch Venue and Artist on every show)
+NAME_REVISIONS = {
+    Venue: 'venue_names',
+    Artist: 'artist_names',
+}
+
+revisions_table = Revision.__table__
+
+
+def bump_revisions(connection, *names):
+    if names:
+        connection.execute(
+            revisions_table.update()
+            .where(revisions_table.c.name.in_(sorted(set(names))))
+            .values(version=revisions_table.c.version + 1)
+        )
+
+
+@event.listens_for(db.session, 'after_flush')
+def _bump_flushed_revisions(session, flush_context):
+    names = {REVISION_MODELS[type(instance)]
+             for instance in list(session.new) + list(session.dirty) + list(session.deleted)
+             if type(instance) in REVISION_MODELS}
+    names.update(NAME_REVISIONS[type(instance)]
+                 for instance in list(session.new) + list(session.deleted)
+                 if type(instance) in NAME_REVISIONS)
+    names.update(NAME_REVISIONS[type(instance)]
+                 for instance in session.dirty
+                 if type(instance) in NAME_REVISIONS and inspect(instance).attrs.name.history.has_changes())
+    bump_revisions(session.connection(), *names)
+
+
+def current_versions(names):
+    rows = db.session.query(Revision.name, Revision.version).filter(Revision.name.in_(names)).all()
+    versions = dict(rows)
+    return [versions.get(name, 0) for name in names]
+
+
+def compute_etag(names, versions):
+    # The negotiated representation is part of the key, as /venues etc. serve HTML and JSON
+    key = '|'.join([current_app.config.get('ETAG_SALT', '')]
+                   + [f'{name}={version}' for name, version in zip(names, versions)]
+                   + [request.full_path, str(request.accept_mimetypes.best)])
+    return hashlib.sha1(key.encode()).hexdigest()[:20]
+
+
+def request_revisions():
+    """The versions the current @conditional view's ETag was computed from,
+    or None when it runs uncached. Anything a view caches in process must be
+    checked against these, or a page built before another process's write
+    would be served under the ETag of that write."""
+    return g.get('revisions')
+
+
+def cache_control(response):
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config.get('HTTP_CACHE_MAX_AGE', 0)
+    shared_max_age = current_app.config.get('HTTP_CACHE_SHARED_MAX_AGE')
+    if shared_max_age:
+        response.cache_control.s_maxage = shared_max_age
+    response.vary.add('Accept')
+    return response
+
+
+def conditional(*names):
+    """Answer GETs with a weak ETag over the revisions of `names`, and with
+    304 Not Modified when the client already holds that version."""
+    names = list(names)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # A pending flash message is rendered into the page once, so it must not be cached
+            if '_flashes' in session:
+                return view(*args, **kwargs)
+
+            versions = current_versions(names)
+            g.revisions = tuple(zip(names, versions))
+            etag = compute_etag(names, versions)
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+                response.set_etag(etag, weak=True)
+                return cache_control(response)
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag, weak=True)
+                cache_control(response)
+            return response
+        return wrapper
+    return decorator
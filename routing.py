@@ -0,0 +1,135 @@
+import random
+import threading
+import time
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy import SQLAlchemy, SignallingSession, get_state
+from sqlalchemy import exc, orm
+from sqlalchemy.sql.dml import UpdateBase
+
+#----------------------------------------------------------------------------#
+# Read replica routing.
+#
+# Each SQLALCHEMY_REPLICA_URIS entry is registered as a `replica_<n>` bind.
+# RoutingSession sends the reads of GET/HEAD requests to one replica, picked
+# per request, and everything else (flushes, Core writes, other methods,
+# CLI commands and jobs) to the primary. After a successful write a client
+# gets a short-lived cookie that keeps its reads on the primary, so it sees
+# its own changes despite replication lag. A replica that cannot be
+# connected to is skipped for REPLICA_RETRY_INTERVAL seconds and the
+# request falls back to the primary.
+#----------------------------------------------------------------------------#
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+STICKY_COOKIE = 'read_primary_until'
+
+
+class ReplicaSet(object):
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._down_until = {}
+        self.keys = []
+        self.sticky_seconds = 5
+        self.retry_interval = 30
+        self.fallbacks = 0
+
+    def configure(self, keys, sticky_seconds, retry_interval):
+        with self._lock:
+            self.keys = list(keys)
+            self.sticky_seconds = sticky_seconds
+            self.retry_interval = retry_interval
+            self._down_until.clear()
+
+    def pick(self):
+        now = time.monotonic()
+        with self._lock:
+            available = [key for key in self.keys if self._down_until.get(key, 0) <= now]
+        return random.choice(available) if available else None
+
+    def mark_down(self, key):
+        with self._lock:
+            self._down_until[key] = time.monotonic() + self.retry_interval
+            self.fallbacks += 1
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "replicas": {key: {"available": self._down_until.get(key, 0) <= now} for key in self.keys},
+                "fallbacks": self.fallbacks,
+            }
+
+
+replicas = ReplicaSet()
+
+
+def configure_replicas(app):
+    # Register the replicas as binds before the engines are created
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    keys = []
+    for n, uri in enumerate(app.config.get('SQLALCHEMY_REPLICA_URIS') or []):
+        keys.append(f'replica_{n}')
+        binds[keys[-1]] = uri
+    if keys:
+        app.config['SQLALCHEMY_BINDS'] = binds
+    replicas.configure(keys, app.config.get('REPLICA_STICKY_SECONDS', 5),
+                       app.config.get('REPLICA_RETRY_INTERVAL', 30))
+    app.after_request(_stick_writers_to_primary)
+
+
+def _stick_writers_to_primary(response):
+    if replicas.keys and request.method not in SAFE_METHODS and response.status_code < 400:
+        response.set_cookie(STICKY_COOKIE, str(time.time() + replicas.sticky_seconds),
+                            max_age=replicas.sticky_seconds, httponly=True, samesite='Lax')
+    return response
+
+
+def _reads_primary():
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def read_replica_key():
+    # The bind this request reads from: a replica key, or None for the primary
+    if not replicas.keys or not has_request_context() or request.method not in SAFE_METHODS:
+        return None
+    if 'read_replica_key' not in g:
+        g.read_replica_key = None if _reads_primary() else replicas.pick()
+    return g.read_replica_key
+
+
+class RoutingSession(SignallingSession):
+
+    def get_bind(self, mapper=None, clause=None):
+        key = None if self._flushing or isinstance(clause, UpdateBase) else read_replica_key()
+        if key is None:
+            return super(RoutingSession, self).get_bind(mapper, clause)
+        return get_state(self.app).db.get_engine(self.app, bind=key)
+
+    def _replica_key(self, engine):
+        for key in replicas.keys:
+            if get_state(self.app).db.get_engine(self.app, bind=key) is engine:
+                return key
+        return None
+
+    def _connection_for_bind(self, engine, execution_options=None, **kw):
+        try:
+            return super(RoutingSession, self)._connection_for_bind(engine, execution_options, **kw)
+        except exc.DBAPIError:
+            key = self._replica_key(engine)
+            if key is None:
+                raise
+            # Nothing has run on the replica yet, so the request can move to the primary
+            replicas.mark_down(key)
+            g.read_replica_key = None
+            current_app.logger.warning('Replica %s unavailable, reading from the primary', key, exc_info=True)
+            return super(RoutingSession, self)._connection_for_bind(self.get_bind(), execution_options, **kw)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
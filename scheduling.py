@@ -0,0 +1,150 @@
+from datetime import timedelta
+
+from forms import ShowForm
+from importer import to_formdata
+from models import db, Venue, Artist, Show
+
+#----------------------------------------------------------------------------#
+# Batch show scheduling.
+#
+# A batch of (artist_id, venue_id, start_time) rows is validated with
+# ShowForm, then checked for double bookings with one query: the rows are
+# sent as a derived table of candidate slots and joined to Show on venue
+# and on artist, each side an index range scan on (venue_id|artist_id,
+# show_time). Two shows conflict when they share a venue or an artist and
+# start less than SHOW_SLOT_MINUTES apart. Rows that conflict with an
+# earlier row of the same batch are rejected too. Everything that passes is
+# inserted in one transaction; on Postgres the venues and artists involved
+# are locked for that transaction so concurrent batches cannot both book
+# the same slot.
+#----------------------------------------------------------------------------#
+
+VENUE_LOCK, ARTIST_LOCK = 1, 2
+
+
+class BatchError(ValueError):
+    pass
+
+
+def validate_rows(rows):
+    # Return ({index: candidate}, {index: result}) for the valid and invalid rows
+    form = ShowForm(formdata=None, meta={'csrf': False})
+    candidates, results = {}, {}
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            results[index] = {"row": index, "status": "invalid", "errors": {"row": ["Expected an object"]}}
+            continue
+        form.process(to_formdata(row, ()))
+        errors = dict(form.errors) if not form.validate() else {}
+        # ShowForm falls back to its defaults for missing fields; a batch row must give all three
+        for field in ('artist_id', 'venue_id', 'start_time'):
+            if field not in errors and row.get(field) in (None, ''):
+                errors[field] = ['This field is required.']
+        if errors:
+            results[index] = {"row": index, "status": "invalid", "errors": errors}
+            continue
+        candidates[index] = {
+            'artist_id': form.artist_id.data,
+            'venue_id': form.venue_id.data,
+            'show_time': form.start_time.data,
+        }
+    return candidates, results
+
+
+def lock_bookings(candidates):
+    # Advisory locks in a fixed order, so concurrent batches cannot deadlock
+    if db.session.get_bind().dialect.name != 'postgresql':
+        return
+    keys = sorted({(VENUE_LOCK, c['venue_id']) for c in candidates.values()}
+                  | {(ARTIST_LOCK, c['artist_id']) for c in candidates.values()})
+    for kind, key in keys:
+        db.session.execute(db.select([db.func.pg_advisory_xact_lock(kind, key)]))
+
+
+def missing_references(candidates):
+    venue_ids = {c['venue_id'] for c in candidates.values()}
+    artist_ids = {c['artist_id'] for c in candidates.values()}
+    found_venues = {row.id for row in db.session.query(Venue.id).filter(Venue.id.in_(venue_ids))}
+    found_artists = {row.id for row in db.session.query(Artist.id).filter(Artist.id.in_(artist_ids))}
+    return venue_ids - found_venues, artist_ids - found_artists
+
+
+def find_conflicts(candidates, slot):
+    """Return {index: [{"show_id", "on"}]} for candidates overlapping an existing show."""
+    if not candidates:
+        return {}
+    slots = db.union_all(*[
+        db.select([
+            db.literal(index, db.Integer).label('row'),
+            db.literal(c['venue_id'], db.Integer).label('venue_id'),
+            db.literal(c['artist_id'], db.Integer).label('artist_id'),
+            db.literal(c['show_time'] - slot, db.DateTime).label('window_start'),
+            db.literal(c['show_time'] + slot, db.DateTime).label('window_end'),
+        ])
+        for index, c in candidates.items()
+    ]).cte('slots')
+
+    shows = Show.__table__
+    in_window = db.and_(shows.c.show_time > slots.c.window_start, shows.c.show_time < slots.c.window_end)
+    query = db.union_all(
+        db.select([slots.c.row, shows.c.id, db.literal('venue').label('on')])
+        .select_from(slots.join(shows, db.and_(shows.c.venue_id == slots.c.venue_id, in_window))),
+        db.select([slots.c.row, shows.c.id, db.literal('artist').label('on')])
+        .select_from(slots.join(shows, db.and_(shows.c.artist_id == slots.c.artist_id, in_window))),
+    )
+
+    conflicts = {}
+    for row, show_id, on in db.session.execute(query):
+        conflicts.setdefault(row, []).append({"show_id": show_id, "on": on})
+    return conflicts
+
+
+def batch_conflicts(candidate, accepted, slot):
+    # Overlaps with rows accepted earlier in the same batch
+    return [{"row": other_index, "on": on}
+            for other_index, other in accepted
+            for on in ('venue', 'artist')
+            if other[f'{on}_id'] == candidate[f'{on}_id']
+            and abs(other['show_time'] - candidate['show_time']) < slot]
+
+
+def schedule_shows(rows, slot_minutes, max_rows):
+    """Insert every valid, non-conflicting row of `rows` and return
+    (created shows, per-row results in input order). The caller commits."""
+    if not isinstance(rows, list) or not rows:
+        raise BatchError('Expected a non-empty list of shows')
+    if len(rows) > max_rows:
+        raise BatchError(f'At most {max_rows} shows can be scheduled per request')
+
+    slot = timedelta(minutes=slot_minutes)
+    candidates, results = validate_rows(rows)
+    lock_bookings(candidates)
+
+    missing_venues, missing_artists = missing_references(candidates)
+    for index, candidate in list(candidates.items()):
+        errors = {}
+        if candidate['venue_id'] in missing_venues:
+            errors['venue_id'] = ['Venue not found.']
+        if candidate['artist_id'] in missing_artists:
+            errors['artist_id'] = ['Artist not found.']
+        if errors:
+            del candidates[index]
+            results[index] = {"row": index, "status": "invalid", "errors": errors}
+
+    existing = find_conflicts(candidates, slot)
+    accepted = []
+    for index, candidate in candidates.items():
+        conflicts = existing.get(index, []) + batch_conflicts(candidate, accepted, slot)
+        if conflicts:
+            results[index] = {"row": index, "status": "conflict", "conflicts": conflicts}
+        else:
+            accepted.append((index, candidate))
+
+    # The mapper events set is_upcoming and queue the counter updates
+    created = [Show(**candidate) for _, candidate in accepted]
+    db.session.add_all(created)
+    db.session.flush()
+    for (index, _), show in zip(accepted, created):
+        results[index] = {"row": index, "status": "created", "id": show.id}
+
+    return created, [results[index] for index in range(len(rows))]
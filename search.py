@@ -0,0 +1,93 @@
+from flask import current_app
+
+from forms import GENRE_CHOICES
+from models import db
+
+#----------------------------------------------------------------------------#
+# Search backends.
+#
+# Venues and artists are matched on name, city, state and genres. Postgres
+# uses pg_trgm: the GIN trigram indexes created by migration 9b2e4c61d7a3
+# serve the ILIKE filters and similarity() ranks the results. Other
+# databases (SQLite for local development) fall back to plain LIKE matching
+# with a simple prefix/substring ranking.
+#----------------------------------------------------------------------------#
+
+
+def _like_pattern(term):
+    # Treat the search term literally, not as a LIKE pattern
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+def _matching_genres(term):
+    lowered = term.lower()
+    return [genre for genre, _ in GENRE_CHOICES if lowered in genre.lower()]
+
+
+class LikeSearch(object):
+
+    def genre_filter(self, model, genres):
+        # genres are stored as JSON text outside Postgres
+        return [model.genres.cast(db.Text).like(f'%"{genre}"%') for genre in genres]
+
+    def genre_items(self, model):
+        # A FROM item yielding one row per genre of each row, and its value column
+        items = db.func.json_each(model.genres).alias('genre_items')
+        return items, db.literal_column('genre_items.value')
+
+    def match(self, model, term):
+        pattern = _like_pattern(term)
+        clauses = [
+            model.name.ilike(pattern, escape='\\'),
+            model.city.ilike(pattern, escape='\\'),
+            model.state.ilike(pattern, escape='\\'),
+        ]
+        clauses.extend(self.genre_filter(model, _matching_genres(term)))
+        return db.or_(*clauses)
+
+    def rank(self, model, term):
+        name = db.func.lower(model.name)
+        term = term.lower()
+        return db.case([
+            (name == term, 3),
+            (name.like(_like_pattern(term)[1:], escape='\\'), 2),
+            (name.like(_like_pattern(term), escape='\\'), 1),
+        ], else_=0)
+
+
+class TrigramSearch(LikeSearch):
+
+    def genre_filter(self, model, genres):
+        # Array containment is served by the GIN index on genres
+        return [model.genres.contains([genre]) for genre in genres]
+
+    def genre_items(self, model):
+        items = db.func.unnest(model.genres).alias('genre_items')
+        return items, db.literal_column('genre_items')
+
+    def rank(self, model, term):
+        return db.func.similarity(model.name, term)
+
+
+BACKENDS = {
+    'postgresql': TrigramSearch(),
+}
+DEFAULT_BACKEND = LikeSearch()
+
+
+def get_backend():
+    return BACKENDS.get(db.engine.dialect.name, DEFAULT_BACKEND)
+
+
+def search(model, term, *columns):
+    """Return up to SEARCH_RESULT_LIMIT rows of `columns` for `model`
+    matching `term`, best matches first."""
+    backend = get_backend()
+    limit = current_app.config.get('SEARCH_RESULT_LIMIT', 50)
+    query = db.session.query(*columns).filter(backend.match(model, term))
+    if term:
+        query = query.order_by(backend.rank(model, term).desc(), model.name)
+    else:
+        query = query.order_by(model.name)
+    return query.limit(limit).all()
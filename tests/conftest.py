@@ -0,0 +1,60 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+# Configure before app.py reads config.py: a throwaway SQLite file, jobs run
+# inline, and debug mode so app.py does not attach its error.log handler
+_db_fd, _db_path = tempfile.mkstemp(suffix='.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{_db_path}'
+os.environ['JOBS_EAGER'] = 'true'
+os.environ['FLASK_DEBUG'] = 'true'
+os.environ['SQL_PROFILE_SAMPLE_RATE'] = '0'
+
+from app import app as fyyur_app  # noqa: E402
+from models import db as fyyur_db  # noqa: E402
+
+
+def pytest_sessionfinish(session, exitstatus):
+    os.close(_db_fd)
+    os.remove(_db_path)
+
+
+@pytest.fixture
+def app():
+    fyyur_app.config['TESTING'] = True
+    with fyyur_app.app_context():
+        fyyur_db.create_all()
+        yield fyyur_app
+        fyyur_db.session.remove()
+        fyyur_db.drop_all()
+
+
+@pytest.fixture
+def db(app):
+    return fyyur_db
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def count_statements(db):
+    """Context manager yielding the list of SQL statements executed inside it."""
+    @contextmanager
+    def counting():
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+    return counting
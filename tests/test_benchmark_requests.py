@@ -0,0 +1,40 @@
+import os
+import re
+import sys
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+from run import RequestFactory, benchmarked_endpoints  # noqa: E402
+
+BUILDERS = sorted(name for name in dir(RequestFactory) if name.startswith('request_'))
+
+# http.client refuses URLs with spaces or control characters
+UNSENDABLE = re.compile(r'[\x00-\x20\x7f]')
+
+
+@pytest.fixture
+def factory():
+    return RequestFactory(list(range(1, 21)), list(range(1, 21)), asset_paths=['css/main.0123456789.css'])
+
+
+@pytest.mark.parametrize('builder', BUILDERS)
+def test_request_builder_urls_parse(factory, builder):
+    for _ in range(20):
+        built = getattr(factory, builder)()
+        if built is None:  # e.g. the delete routes once their rows are used up
+            continue
+        method, path, kwargs = built
+        parts = urlsplit(path)
+        assert parts.path.startswith('/') and not parts.scheme and not parts.netloc, path
+        assert UNSENDABLE.search(path) is None, path
+        if parts.query:
+            parse_qsl(parts.query, strict_parsing=True)
+
+
+def test_every_route_has_a_builder(app, factory):
+    endpoints, missing = benchmarked_endpoints(app, factory)
+    assert missing == []
+    assert 'assets' in endpoints
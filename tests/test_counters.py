@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from counters import roll_over_upcoming_shows
+from jobs import make_worker
+from models import Artist, Show, Venue
+
+
+@pytest.fixture
+def queued_jobs(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'JOBS_EAGER', False)
+
+
+def counts(db, venue_id, artist_id):
+    db.session.expire_all()
+    return Venue.query.get(venue_id).upcoming_shows_count, Artist.query.get(artist_id).upcoming_shows_count
+
+
+def test_rollover_before_queued_job_does_not_count_show_twice(db, queued_jobs):
+    venue = Venue(name='The Musical Hop', city='San Francisco', state='CA', genres=['Jazz'])
+    artist = Artist(name='Guns N Petals', city='San Francisco', state='CA', genres=['Rock n Roll'])
+    db.session.add_all([venue, artist])
+    db.session.flush()
+    db.session.add_all([
+        Show(venue_id=venue.id, artist_id=artist.id, show_time=datetime.now() + timedelta(minutes=1)),
+        Show(venue_id=venue.id, artist_id=artist.id, show_time=datetime.now() + timedelta(days=1)),
+    ])
+    db.session.commit()
+    assert counts(db, venue.id, artist.id) == (0, 0)  # jobs still queued
+
+    # The first show starts before the worker gets to its job
+    assert roll_over_upcoming_shows(now=datetime.now() + timedelta(hours=1)) == 1
+    assert counts(db, venue.id, artist.id) == (1, 1)
+
+    assert make_worker().work_once() == (2, 2)
+    assert counts(db, venue.id, artist.id) == (1, 1)
@@ -0,0 +1,37 @@
+import base64
+import json
+
+import pytest
+
+from models import Artist, Show
+from pagination import InvalidCursor, decode_cursor, encode_cursor
+
+
+def crafted(values, direction='next'):
+    payload = json.dumps({"v": values, "d": direction}).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def test_decode_cursor_round_trips(app):
+    values, direction = decode_cursor(encode_cursor(['2024-06-01T20:00:00', 7], 'prev'),
+                                      [Show.show_time, Show.id])
+    assert direction == 'prev'
+    assert values[1] == 7 and values[0].year == 2024
+
+
+@pytest.mark.parametrize('values, keys', [
+    (["abc"], [Artist.id]),
+    ([True], [Artist.id]),
+    ([1.5], [Artist.id]),
+    ([3, 1], [Artist.name, Artist.id]),
+    (["not a date", 1], [Show.show_time, Show.id]),
+    ([1], [Artist.name, Artist.id]),
+])
+def test_decode_cursor_rejects_mistyped_values(app, values, keys):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(crafted(values), keys)
+
+
+def test_mistyped_cursor_is_a_bad_request(client):
+    response = client.get('/artists?cursor=' + crafted(["abc"]), headers={'Accept': 'application/json'})
+    assert response.status_code == 400
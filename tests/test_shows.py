@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+from cache import fragment_cache
+from models import Artist, Show, Venue
+
+
+def add_show(db, venue_genres, artist_genres, when):
+    venue = Venue(name='The Dueling Pianos Bar', city='New York', state='NY', genres=venue_genres)
+    artist = Artist(name='Matt Quevedo', city='New York', state='NY', genres=artist_genres)
+    db.session.add_all([venue, artist])
+    db.session.flush()
+    show = Show(venue_id=venue.id, artist_id=artist.id, show_time=when)
+    db.session.add(show)
+    db.session.commit()
+    return show.id
+
+
+def calendar(client, **args):
+    start = datetime.now().date()
+    args.setdefault('start', start.isoformat())
+    args.setdefault('end', (start + timedelta(days=7)).isoformat())
+    return client.get('/shows/calendar', query_string=args)
+
+
+def test_calendar_genre_is_matched_case_insensitively(db, client):
+    jazz = add_show(db, ['Jazz'], ['Jazz'], datetime.now() + timedelta(days=1))
+    add_show(db, ['Folk'], ['Folk'], datetime.now() + timedelta(days=2))
+
+    response = calendar(client, genre='jazz')
+    assert response.status_code == 200
+    assert [show['id'] for show in response.get_json()['shows']] == [jazz]
+
+
+def test_calendar_rejects_unknown_genre(db, client):
+    response = calendar(client, genre='Polka Metal')
+    assert response.status_code == 400
+    assert 'Unknown genre' in response.get_json()['error']
+
+
+def test_show_tiles_survive_counter_updates(db, client):
+    first = add_show(db, ['Jazz'], ['Jazz'], datetime.now() + timedelta(days=1))
+    show = Show.query.get(first)
+    fragment_cache.clear()
+    assert client.get('/shows').status_code == 200
+    misses = fragment_cache.misses
+
+    # A new show at the same venue and artist moves their upcoming show counters
+    db.session.add(Show(venue_id=show.venue_id, artist_id=show.artist_id,
+                        show_time=datetime.now() + timedelta(days=2)))
+    db.session.commit()
+    assert client.get('/shows').status_code == 200
+    assert fragment_cache.misses == misses + 1  # only the new show's tile is rendered
+
+    Artist.query.get(show.artist_id).name = 'Guns N Petals'
+    db.session.commit()
+    assert b'Guns N Petals' in client.get('/shows').data
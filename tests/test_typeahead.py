@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+
+from models import Artist, Show, Venue
+from revisions import current_versions
+from typeahead import INDEXES
+
+
+def name_versions():
+    return current_versions(['venue_names', 'artist_names'])
+
+
+def test_name_revisions_move_only_with_names(db):
+    venue = Venue(name='Park Square Live Music & Coffee', city='San Francisco', state='CA', genres=['Jazz'])
+    artist = Artist(name='The Wild Sax Band', city='San Francisco', state='CA', genres=['Jazz'])
+    db.session.add_all([venue, artist])
+    db.session.commit()
+    added = name_versions()
+
+    # Shows and counter updates leave the name lists alone
+    show = Show(venue_id=venue.id, artist_id=artist.id, show_time=datetime.now() + timedelta(days=1))
+    db.session.add(show)
+    db.session.commit()
+    venue.phone = '415-000-1234'
+    db.session.commit()
+    db.session.delete(show)
+    db.session.commit()
+    assert name_versions() == added
+
+    artist.name = 'The Wild Sax Quartet'
+    db.session.commit()
+    assert name_versions() == [added[0], added[1] + 1]
+
+
+def test_refresh_does_not_wait_for_a_rebuild_in_progress(db, monkeypatch):
+    index = INDEXES['venues']
+    monkeypatch.setattr(index, 'refresh_interval', 0)
+    db.session.add(Venue(name='The Musical Hop', city='San Francisco', state='CA', genres=['Jazz']))
+    db.session.commit()
+    index.refresh()
+    assert [name for _, name in index.search('musical')[0]] == ['The Musical Hop']
+
+    db.session.add(Venue(name='The Musical Box', city='San Francisco', state='CA', genres=['Jazz']))
+    db.session.commit()
+    # Another request holds the rebuild lock: search the index we already have
+    with index._lock:
+        index.refresh()
+        assert [name for _, name in index.search('musical')[0]] == ['The Musical Hop']
+    index.refresh()
+    assert sorted(name for _, name in index.search('musical')[0]) == ['The Musical Box', 'The Musical Hop']
@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from cache import page_cache
+from importer import IMPORTERS
+from models import Artist, Show, Venue
+
+
+@pytest.fixture
+def no_page_cache(monkeypatch):
+    # A cached page would be served without running the queries under test
+    page_cache.clear()
+    monkeypatch.setattr(page_cache, 'maxsize', 0)
+
+
+def add_venues(db, areas, venues_per_area):
+    db.session.add_all([
+        Venue(name=f'Venue {area}-{n}', city=f'City {area}', state='CA', genres=['Jazz'])
+        for area in range(areas) for n in range(venues_per_area)
+    ])
+    db.session.commit()
+
+
+def add_venue_with_shows(db, shows):
+    venue = Venue(name='The Musical Hop', city='San Francisco', state='CA', genres=['Jazz'])
+    artists = [Artist(name=f'Artist {n}', city='San Francisco', state='CA', genres=['Jazz']) for n in range(shows)]
+    db.session.add(venue)
+    db.session.add_all(artists)
+    db.session.flush()
+    now = datetime.now()
+    # Half of the shows in the past, half upcoming
+    db.session.add_all([
+        Show(venue_id=venue.id, artist_id=artist.id, show_time=now + timedelta(days=n - shows // 2))
+        for n, artist in enumerate(artists)
+    ])
+    db.session.commit()
+    return venue.id
+
+
+def reset(db):
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+
+
+def venues_page_statements(db, client, count_statements, areas, venues_per_area):
+    add_venues(db, areas, venues_per_area)
+    with count_statements() as statements:
+        response = client.get('/venues?per_page=500')
+    assert response.status_code == 200
+    return len(statements)
+
+
+def venue_page_statements(db, client, count_statements, shows):
+    venue_id = add_venue_with_shows(db, shows)
+    with count_statements() as statements:
+        response = client.get(f'/venues/{venue_id}')
+    assert response.status_code == 200
+    assert response.data.count(b'/artists/') >= shows
+    return len(statements)
+
+
+def test_venues_page_statement_count_is_constant(app, db, client, count_statements):
+    few = venues_page_statements(db, client, count_statements, areas=2, venues_per_area=2)
+    reset(db)
+    many = venues_page_statements(db, client, count_statements, areas=40, venues_per_area=10)
+    assert few == many
+
+
+def test_venue_page_statement_count_is_constant(app, db, client, count_statements, no_page_cache):
+    one = venue_page_statements(db, client, count_statements, shows=1)
+    reset(db)
+    many = venue_page_statements(db, client, count_statements, shows=60)
+    assert one == many
+
+
+def test_cached_venue_page_follows_writes_from_other_processes(app, db, client):
+    # A bulk import (or a job worker, or another web process) writes without
+    # touching this process's page cache; the revisions still move
+    venue_id = add_venue_with_shows(db, 1)
+    artist = Artist(name='Guns N Petals', city='San Francisco', state='CA', genres=['Rock n Roll'])
+    db.session.add(artist)
+    db.session.commit()
+    page_cache.clear()
+
+    first = client.get(f'/venues/{venue_id}')
+    assert first.status_code == 200 and b'Guns N Petals' not in first.data
+
+    IMPORTERS['shows'].insert([{'venue_id': venue_id, 'artist_id': artist.id,
+                                'show_time': datetime.now() + timedelta(days=3), 'is_upcoming': True}])
+    db.session.commit()
+
+    second = client.get(f'/venues/{venue_id}')
+    assert second.status_code == 200 and b'Guns N Petals' in second.data
+    assert second.headers['ETag'] != first.headers['ETag']
+    revalidated = client.get(f'/venues/{venue_id}', headers={'If-None-Match': first.headers['ETag']})
+    assert revalidated.status_code == 200 and b'Guns N Petals' in revalidated.data
@@ -0,0 +1,120 @@
+import threading
+import time
+from bisect import bisect_left, bisect_right
+
+from models import db, Venue, Artist
+from pagination import InvalidCursor, decode_cursor, encode_cursor
+from revisions import current_versions
+
+#----------------------------------------------------------------------------#
+# Typeahead name index.
+#
+# The show form looks artists and venues up by name instead of asking for
+# raw ids. Each process keeps a sorted in-memory index of (name suffix, id)
+# for every word boundary of every name, so "jazz" matches both "Jazz Cafe"
+# and "The Jazz Club", and a lookup is a bisect into that list. The index is
+# built from an id/name projection and rebuilt when the table's name
+# revision (see revisions.py) changes, at most once per `refresh_interval`
+# seconds, by one request while concurrent ones search the previous index.
+#----------------------------------------------------------------------------#
+
+
+def normalize(text):
+    return ' '.join(text.casefold().split())
+
+
+def suffixes(name):
+    words = normalize(name or '').split(' ')
+    return [' '.join(words[start:]) for start in range(len(words))]
+
+
+class NameIndex(object):
+
+    def __init__(self, model, revision, refresh_interval=5):
+        self.model = model
+        self.revision = revision
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._index = ([], {})  # (sorted [(suffix, id)], {id: name}), swapped as one
+        self._version = None
+        self._built_at = 0.0
+
+    def build(self, rows):
+        keys, names = [], {}
+        for model_id, name in rows:
+            names[model_id] = name
+            keys.extend((suffix, model_id) for suffix in suffixes(name))
+        keys.sort()
+        return keys, names
+
+    def refresh(self):
+        version = current_versions([self.revision])[0]
+        if version == self._version or time.monotonic() - self._built_at < self.refresh_interval:
+            return
+        # One request rebuilds while the others keep searching the current
+        # index; only the first build, with nothing to search yet, is waited for
+        if not self._lock.acquire(blocking=self._version is None):
+            return
+        try:
+            if version == self._version:
+                return
+            rows = db.session.query(self.model.id, self.model.name).yield_per(5000)
+            # Readers keep using the old index until the new one is swapped in
+            self._index = self.build(rows)
+            self._version = version
+            self._built_at = time.monotonic()
+        finally:
+            self._lock.release()
+
+    def search(self, term, after=None, limit=10):
+        """Return ([(id, name)], next_after) for names with a word starting with `term`."""
+        keys, names = self._index
+        term = normalize(term)
+        if not term:
+            return [], None
+
+        position = bisect_right(keys, tuple(after)) if after else bisect_left(keys, (term,))
+        results = []
+        while position < len(keys) and len(results) < limit:
+            suffix, model_id = keys[position]
+            if not suffix.startswith(term):
+                break
+            # A name with several matching words is listed once, at its first
+            # matching suffix, so it cannot reappear on a later page
+            if suffix == min(other for other in suffixes(names[model_id]) if other.startswith(term)):
+                results.append((model_id, names[model_id]))
+            position += 1
+
+        more = position < len(keys) and keys[position][0].startswith(term)
+        return results, keys[position - 1] if more else None
+
+    def stats(self):
+        keys, names = self._index
+        return {"names": len(names), "entries": len(keys), "version": self._version}
+
+
+INDEXES = {
+    'venues': NameIndex(Venue, 'venue_names'),
+    'artists': NameIndex(Artist, 'artist_names'),
+}
+
+
+def configure_typeahead(refresh_interval):
+    for index in INDEXES.values():
+        index.refresh_interval = refresh_interval
+
+
+def lookup(kind, term, cursor=None, limit=10):
+    index = INDEXES[kind]
+    index.refresh()
+    after = None
+    if cursor:
+        values, _ = decode_cursor(cursor, [index.model.name, index.model.id])
+        if not isinstance(values[0], str) or not isinstance(values[1], int):
+            raise InvalidCursor(cursor)
+        after = values
+    results, next_after = index.search(term, after, limit)
+    return {
+        "results": [{"id": model_id, "name": name} for model_id, name in results],
+        "next": encode_cursor(list(next_after), 'next') if next_after else None,
+    }
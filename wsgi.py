@@ -0,0 +1,31 @@
+import os
+
+from app import app
+from db_pool import dispose_engines
+
+#----------------------------------------------------------------------------#
+# WSGI entry point.
+#
+# Production servers load `wsgi:application`, e.g. with the pre-fork
+# settings in gunicorn.conf.py:
+#
+#   gunicorn -c gunicorn.conf.py wsgi:application
+#
+# There is no application factory: app.py builds the one app at import
+# (its views, caches and job/replica registries are module state), and
+# prepare_app() only readies that app for serving. Its engines are disposed
+# before it is handed to the server, so a master that imports the app
+# before forking (preload_app) passes no open connections on to its workers.
+#----------------------------------------------------------------------------#
+
+
+def prepare_app():
+    if app.debug:
+        app.logger.warning('Debug mode is on; unset FLASK_ENV/FLASK_DEBUG in production')
+    if 'SECRET_KEY' not in os.environ:
+        app.logger.warning('SECRET_KEY is not set; sessions signed by one process are rejected by the others')
+    dispose_engines(app)
+    return app
+
+
+application = prepare_app()